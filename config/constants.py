@@ -29,7 +29,32 @@ INCIDENT_WEIGHTS = {
 CCTV_SETTINGS = {
     'FRAME_INTERVAL': 30,  # Process every 30th frame
     'CONFIDENCE_THRESHOLD': 0.5,
-    'MAX_FRAME_SIZE': (640, 640)
+    'MAX_FRAME_SIZE': (640, 640),  # Sampled frames are downscaled to fit this once, before any other stage
+    'LETTERBOX': False,  # Also pad prepared frames to exactly MAX_FRAME_SIZE (for fixed-shape backends)
+    'BATCH_SIZE': 8,  # Sampled frames per YOLO call
+    'MOTION_PIXEL_THRESHOLD': 25,  # Grayscale difference counted as a changed pixel
+    'MOTION_MIN_AREA': 0.01,  # Fraction of changed pixels needed to run the detector
+    'MOTION_MAX_SKIPPED': 30,  # Re-run the detector after this many skipped frames (0 = never)
+    'CHECKPOINT_INTERVAL': 100,  # Sampled frames between resume checkpoints
+    'DEDUP_HASH_DISTANCE': 6,  # Max differing bits (of 64) for two anomaly frames to count as the same scene
+    'DEDUP_WINDOW': 5,  # Recently stored frames per camera that new anomaly frames are compared against
+    'IMAGE_FORMAT': 'jpg',  # Saved frame format: 'jpg' or 'webp'
+    'IMAGE_QUALITY': 90,  # Encoder quality (0-100) for saved frames
+    'IMAGE_WRITER_THREADS': 2,  # Background threads encoding and writing frame images
+    'IMAGE_WRITER_QUEUE': 32,  # Frame images waiting to be written before the caller blocks
+    'ADAPTIVE_MIN_INTERVAL': 5,  # Densest adaptive sampling, used from ADAPTIVE_FULL_SCORE upwards
+    'ADAPTIVE_MAX_INTERVAL': 60,  # Sparsest adaptive sampling, used while the scene scores zero
+    'ADAPTIVE_FULL_SCORE': 1.5,  # Threat score (the HIGH level) that selects the minimum interval
+    'ADAPTIVE_BACKOFF': 1.5,  # Factor the interval may grow by per sample once scores drop
+    'CAMERA_PRIORITY_BOOST': {'LOW': 1.0, 'MEDIUM': 2.0, 'HIGH': 4.0},  # Budget/share multiplier by camera state
+    'CAMERA_BURST_SECONDS': 2.0,  # Unused frame budget a camera may save up, in seconds of budget
+    'CAMERA_STATS_WINDOW': 10.0,  # Seconds over which achieved per-camera FPS is measured
+    'EVENT_MAX_GAP': 2  # Normal sampled frames tolerated inside one anomaly event before it is closed
+}
+
+# Social Media Ingestion Settings
+INGESTION_SETTINGS = {
+    'ANALYSIS_CHUNK_SIZE': 256,  # Posts collected before they are analyzed together
 }
 
 # API Settings (if using external APIs)
@@ -4,6 +4,8 @@ YOLO_CONFIG = {
     'MODEL_PATH': 'yolov8n.pt',
     'CONFIDENCE_THRESHOLD': 0.25,
     'IOU_THRESHOLD': 0.45,
+    'IMAGE_SIZE': 640,
+    'BACKEND': 'pytorch',  # pytorch, onnx, onnx-int8 or openvino
     'CLASS_NAMES': [
         'person', 'bicycle', 'car', 'motorcycle', 'airplane', 'bus', 'train', 'truck',
         'boat', 'traffic light', 'fire hydrant', 'stop sign', 'parking meter', 'bench',
@@ -24,12 +26,14 @@ NLP_MODELS = {
     'SENTIMENT': {
         'model_name': 'cardiffnlp/twitter-roberta-base-sentiment-latest',
         'labels': ['negative', 'neutral', 'positive'],
-        'max_length': 512
+        'max_length': 512,
+        'batch_size': 32  # Texts per forward pass in batched analysis
     },
     'THREAT_CLASSIFICATION': {
         'model_name': 'cardiffnlp/twitter-roberta-base-offensive',
         'labels': ['not-offensive', 'offensive'],
-        'max_length': 512
+        'max_length': 512,
+        'batch_size': 32
     }
 }
 
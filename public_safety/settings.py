@@ -90,6 +90,9 @@ AI_MODELS = {
     'THREAT_MODEL': 'cardiffnlp/twitter-roberta-base-offensive',
 }
 
+# Load AI models when the app starts (e.g. in the web server) instead of on first use
+WARM_AI_MODELS = os.environ.get('WARM_AI_MODELS', '') == '1'
+
 # Dataset Paths
 DATASET_PATHS = {
     'SOCIAL_MEDIA_RAW': BASE_DIR / 'data' / 'social_media' / 'raw',
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import SocialMediaPost, CCTVAnalysis, Alert, CitizenReport
+from .models import SocialMediaPost, CCTVAnalysis, CCTVEvent, Alert, CitizenReport, ProcessedVideo
 
 @admin.register(SocialMediaPost)
 class SocialMediaPostAdmin(admin.ModelAdmin):
@@ -12,6 +12,12 @@ class CCTVAnalysisAdmin(admin.ModelAdmin):
     list_display = ['id', 'threat_level', 'anomaly_detected', 'crowd_density', 'timestamp']
     list_filter = ['threat_level', 'anomaly_detected']
 
+@admin.register(CCTVEvent)
+class CCTVEventAdmin(admin.ModelAdmin):
+    list_display = ['id', 'video_path', 'threat_level', 'start_frame', 'end_frame', 'max_threat_score',
+                    'peak_crowd_density', 'created_at']
+    list_filter = ['threat_level']
+
 @admin.register(Alert)
 class AlertAdmin(admin.ModelAdmin):  # Remove GISModelAdmin
     list_display = ['title', 'threat_level', 'incident_type', 'confirmed', 'created_at']
@@ -20,4 +26,9 @@ class AlertAdmin(admin.ModelAdmin):  # Remove GISModelAdmin
 @admin.register(CitizenReport)
 class CitizenReportAdmin(admin.ModelAdmin):
     list_display = ['id', 'incident_type', 'verified', 'created_at']
-    list_filter = ['incident_type', 'verified']
\ No newline at end of file
+    list_filter = ['incident_type', 'verified']
+
+@admin.register(ProcessedVideo)
+class ProcessedVideoAdmin(admin.ModelAdmin):
+    list_display = ['path', 'last_frame', 'completed', 'updated_at']
+    list_filter = ['completed']
\ No newline at end of file
@@ -1,5 +1,10 @@
 from .social_media_analyzer import SocialMediaAnalyzer
 from .cctv_analyzer import CCTVAnalyzer
 from .alert_summarizer import AlertSummarizer
+from .motion_gate import MotionGate
+from .frame_dedup import DuplicateFrameFilter
+from .keyword_matcher import KeywordMatcher
+from .model_registry import get_alert_summarizer, get_pipeline, get_yolo, warm_models
 
-__all__ = ['SocialMediaAnalyzer', 'CCTVAnalyzer', 'AlertSummarizer']
\ No newline at end of file
+__all__ = ['SocialMediaAnalyzer', 'CCTVAnalyzer', 'AlertSummarizer', 'MotionGate', 'DuplicateFrameFilter',
+           'KeywordMatcher', 'get_alert_summarizer', 'get_pipeline', 'get_yolo', 'warm_models']
\ No newline at end of file
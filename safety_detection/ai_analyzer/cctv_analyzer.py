@@ -1,12 +1,18 @@
-import cv2
 import numpy as np
-from ultralytics import YOLO
 import os
+from config.constants import CCTV_SETTINGS
+from config.model_configs import YOLO_CONFIG
+from ..utils.frame_preprocess import prepare_frame
+from ..utils.frame_sampler import create_sampler
+from .model_registry import get_yolo
 
 class CCTVAnalyzer:
-    def __init__(self, model_path='yolov8n.pt'):
-        self.model = YOLO(model_path)
+    def __init__(self, model_path='yolov8n.pt', batch_size=None, backend=None, instance=None):
+        self.model_path = model_path
+        self.backend = backend
+        self.instance = instance
         self.anomaly_threshold = 0.5
+        self.batch_size = batch_size or CCTV_SETTINGS['BATCH_SIZE']
         
         # Object weights for threat calculation
         self.object_weights = {
@@ -20,6 +26,20 @@ class CCTVAnalyzer:
             'knife': 0.8,
             'gun': 0.9,
         }
+        
+        # Detection categories and the fallback weight used for classes missing from object_weights
+        self.categories = {
+            'people': (['person'], 0.1),
+            'vehicles': (['car', 'truck', 'bus', 'motorcycle', 'bicycle'], 0.05),
+            'weapons': (['knife', 'gun'], 0.8),
+            'fire': (['fire'], 0.9),
+        }
+        self._build_class_lookup(YOLO_CONFIG['CLASS_NAMES'])
+    
+    @property
+    def model(self):
+        """YOLO model shared by every analyzer in this process (per instance), loaded on first use"""
+        return get_yolo(self.model_path, self.backend, self.instance)
     
     def analyze_video_frame(self, frame_path):
         """Analyze a single frame for anomalies and threats"""
@@ -31,64 +51,114 @@ class CCTVAnalyzer:
             
             # Run YOLO inference
             results = self.model(frame_path)
-            result = results[0]
-            
-            detections = {
-                'people': 0,
-                'vehicles': 0,
-                'weapons': 0,
-                'fire': 0,
-                'objects': []
-            }
-            
-            threat_score = 0
-            
-            for box in result.boxes:
-                class_id = int(box.cls[0])
-                class_name = result.names[class_id]
-                confidence = float(box.conf[0])
-                
-                # Count specific object types
-                if class_name == 'person':
-                    detections['people'] += 1
-                    threat_score += self.object_weights.get('person', 0.1) * confidence
-                elif class_name in ['car', 'truck', 'bus', 'motorcycle', 'bicycle']:
-                    detections['vehicles'] += 1
-                    threat_score += self.object_weights.get(class_name, 0.05) * confidence
-                elif class_name in ['knife', 'gun']:
-                    detections['weapons'] += 1
-                    threat_score += self.object_weights.get(class_name, 0.8) * confidence
-                elif class_name == 'fire':
-                    detections['fire'] += 1
-                    threat_score += self.object_weights.get('fire', 0.9) * confidence
-                
-                detections['objects'].append({
-                    'class': class_name,
-                    'confidence': confidence,
-                    'bbox': box.xyxy[0].tolist()
-                })
-            
-            # Adjust threat score based on crowd density
-            if detections['people'] > 20:
-                threat_score += 0.3
-            if detections['people'] > 50:
-                threat_score += 0.5
-            
-            # Calculate threat level
-            threat_level = self._calculate_threat_level(threat_score)
-            
-            return {
-                'detections': detections,
-                'threat_level': threat_level,
-                'threat_score': threat_score,
-                'crowd_density': detections['people'],
-                'anomaly_detected': threat_level != 'LOW'
-            }
+            return self._summarize_result(results[0])
             
         except Exception as e:
             print(f"Error analyzing frame {frame_path}: {e}")
             return None
     
+    def analyze_frame(self, frame):
+        """Analyze a decoded BGR frame (as returned by cv2.VideoCapture) in memory"""
+        try:
+            results = self.model(frame)
+            return self._summarize_result(results[0])
+            
+        except Exception as e:
+            print(f"Error analyzing in-memory frame: {e}")
+            return None
+    
+    def analyze_frames(self, frames, batch_size=None, transforms=None):
+        """Analyze decoded frames in batches, returning one result (or None) per frame
+        
+        For frames from prepare_frame(), pass their FrameTransforms so boxes are
+        reported in original-resolution coordinates.
+        """
+        batch_size = batch_size or self.batch_size
+        analysis_results = []
+        
+        for start in range(0, len(frames), batch_size):
+            batch = frames[start:start + batch_size]
+            batch_transforms = transforms[start:start + batch_size] if transforms else [None] * len(batch)
+            try:
+                # One model call per batch instead of one per frame
+                results = self.model(list(batch))
+                analysis_results.extend(self._summarize_result(result, transform)
+                                        for result, transform in zip(results, batch_transforms))
+            except Exception as e:
+                print(f"Error analyzing batch of {len(batch)} frames: {e}")
+                analysis_results.extend([None] * len(batch))
+        
+        return analysis_results
+    
+    def _summarize_result(self, result, transform=None):
+        """Convert a single YOLO result into the detections/threat_score dict"""
+        self._ensure_class_lookup(result.names)
+        
+        # Work on the whole box tensor at once instead of box by box
+        boxes = result.boxes
+        class_ids = boxes.cls.cpu().numpy().astype(np.intp)
+        confidences = boxes.conf.cpu().numpy().astype(np.float64)
+        
+        counts = np.bincount(self._class_categories[class_ids], minlength=len(self._category_names) + 1)
+        threat_score = float(np.dot(self._class_weights[class_ids], confidences))
+        
+        detections = {name: int(counts[index + 1]) for index, name in enumerate(self._category_names)}
+        xyxy = boxes.xyxy.cpu().numpy()
+        if transform is not None:
+            xyxy = transform.to_original(xyxy)
+        detections['objects'] = [
+            {'class': self._class_names[class_id], 'confidence': confidence, 'bbox': bbox}
+            for class_id, confidence, bbox in zip(class_ids.tolist(), boxes.conf.cpu().numpy().tolist(),
+                                                  xyxy.tolist())
+        ]
+        
+        # Adjust threat score based on crowd density
+        if detections['people'] > 20:
+            threat_score += 0.3
+        if detections['people'] > 50:
+            threat_score += 0.5
+        
+        # Calculate threat level
+        threat_level = self._calculate_threat_level(threat_score)
+        
+        return {
+            'detections': detections,
+            'threat_level': threat_level,
+            'threat_score': threat_score,
+            'crowd_density': detections['people'],
+            'anomaly_detected': threat_level != 'LOW'
+        }
+    
+    def _build_class_lookup(self, class_names):
+        """Precompute class id -> category index and class id -> threat weight arrays"""
+        self._class_names = list(class_names)
+        self._category_names = list(self.categories)
+        self._class_categories = np.zeros(len(self._class_names), dtype=np.intp)
+        self._class_weights = np.zeros(len(self._class_names), dtype=np.float64)
+        
+        for class_id, class_name in enumerate(self._class_names):
+            for index, (category, (members, default_weight)) in enumerate(self.categories.items()):
+                if class_name in members:
+                    # Index 0 is reserved for classes outside every category
+                    self._class_categories[class_id] = index + 1
+                    self._class_weights[class_id] = self.object_weights.get(class_name, default_weight)
+                    break
+        
+        self._lookup_source = None
+    
+    def _ensure_class_lookup(self, names):
+        """Rebuild the lookup arrays if the model's class names differ from the configured ones"""
+        if names is self._lookup_source:
+            return
+        
+        if isinstance(names, dict):
+            model_names = [names.get(class_id, '') for class_id in range(max(names, default=-1) + 1)]
+        else:
+            model_names = list(names)
+        if model_names != self._class_names:
+            self._build_class_lookup(model_names)
+        self._lookup_source = names
+    
     def _calculate_threat_level(self, threat_score):
         """Calculate threat level based on threat score"""
         if threat_score > 1.5:
@@ -98,36 +168,128 @@ class CCTVAnalyzer:
         else:
             return "LOW"
     
-    def process_video(self, video_path, output_dir=None, frame_interval=10):
-        """Process entire video and extract key frames"""
+    def process_video(self, video_path, output_dir=None, frame_interval=10, batch_size=None, seconds_interval=None,
+                      motion_gate=None, adaptive_interval=None):
+        """Process entire video and extract key frames
+        
+        Returns every result from iter_video() as a list; prefer iter_video() for
+        long footage so memory does not grow with video length.
+        """
         try:
-            cap = cv2.VideoCapture(video_path)
-            frame_count = 0
-            analysis_results = []
-            
-            while cap.isOpened():
-                ret, frame = cap.read()
-                if not ret:
-                    break
-                
-                if frame_count % frame_interval == 0:
-                    # Save frame temporarily
-                    temp_frame_path = f"temp_frame_{frame_count}.jpg"
-                    cv2.imwrite(temp_frame_path, frame)
-                    
-                    # Analyze frame
-                    result = self.analyze_video_frame(temp_frame_path)
-                    if result:
-                        analysis_results.append(result)
-                    
-                    # Clean up
-                    os.remove(temp_frame_path)
-                
-                frame_count += 1
-            
-            cap.release()
-            return analysis_results
+            return list(self.iter_video(video_path, frame_interval, batch_size, seconds_interval, motion_gate,
+                                        adaptive_interval=adaptive_interval))
             
         except Exception as e:
             print(f"Error processing video: {e}")
-            return []
\ No newline at end of file
+            return []
+    
+    def iter_video(self, video_path, frame_interval=10, batch_size=None, seconds_interval=None, motion_gate=None,
+                   include_frames=False, adaptive_interval=None):
+        """Yield one result per sampled frame as soon as its batch has been analyzed
+        
+        Frames are sampled every frame_interval frames, or every seconds_interval
+        seconds of media time when given; skipped frames are only grabbed, not converted.
+        With a MotionGate, static frames reuse the previous result instead of
+        running the detector. Each result also carries video_path, frame_number
+        and timestamp (seconds into the video), plus the frame when include_frames
+        is set. Frames are downscaled once by prepare_frame() and that copy is used
+        for the motion check, inference and the returned frame; boxes are in
+        original-resolution coordinates. Only one batch of frames is held at a time.
+        
+        With adaptive_interval=(min_interval, max_interval) the interval instead
+        follows the threat score (see AdaptiveFrameSampler).
+        """
+        sampler = create_sampler(video_path, frame_interval, seconds_interval, adaptive_interval)
+        for entry, result in self.iter_analyzed(self.sample_frames(sampler, motion_gate), batch_size):
+            if not result:
+                continue
+            record = dict(result, video_path=video_path, frame_number=entry['frame_number'],
+                          timestamp=entry['timestamp'])
+            if include_frames:
+                record['frame'] = entry['frame']
+            yield record
+    
+    def sample_frames(self, sampler, motion_gate=None):
+        """Yield a frame entry for iter_analyzed() per frame the sampler keeps
+        
+        Each frame is downscaled once by prepare_frame() and checked by the motion
+        gate, if any; entries that fail the check are marked not to be analyzed.
+        """
+        for frame_number, timestamp, frame in sampler:
+            frame, transform = prepare_frame(frame)
+            yield {
+                'video_path': sampler.video_path,
+                'frame_number': frame_number,
+                'timestamp': timestamp,
+                'frame': frame,
+                'transform': transform,
+                'analyze': motion_gate is None or motion_gate.has_motion(frame),
+                'sampler': sampler,
+            }
+    
+    def iter_analyzed(self, entries, batch_size=None):
+        """Analyze frame entries in batches and yield (entry, result) for each, in order
+        
+        entries is any iterable of sample_frames() entries, possibly chained from
+        several videos so that batches span them; extra keys are passed through.
+        Only one batch is held at a time. Frames the motion gate skipped inherit
+        the last result of their video, and every result is fed back to the
+        entry's sampler. result is None if the frame could not be analyzed.
+        """
+        batch_size = batch_size or self.batch_size
+        last_results = {}
+        
+        for batch in batch_entries(entries, batch_size):
+            analyzed = [entry for entry in batch if entry['analyze']]
+            analysis_results = self.analyze_frames([entry['frame'] for entry in analyzed], batch_size,
+                                                   [entry['transform'] for entry in analyzed])
+            for entry, result in merge_results(batch, analysis_results, last_results):
+                if result and entry.get('sampler'):
+                    entry['sampler'].observe(result['threat_score'])
+                yield entry, result
+
+
+def batch_entries(entries, batch_size):
+    """Group frame entries into batches holding batch_size frames to analyze"""
+    batch = []
+    analyzed = 0
+    for entry in entries:
+        batch.append(entry)
+        analyzed += bool(entry['analyze'])
+        
+        # Cap skipped frames too, so a static scene cannot grow the batch without bound.
+        # An adaptive sampler that may change its interval gets each result before sampling on
+        sampler = entry.get('sampler')
+        if (analyzed >= batch_size or len(batch) >= batch_size * 4
+                or (sampler is not None and sampler.needs_feedback())):
+            yield batch
+            batch = []
+            analyzed = 0
+    
+    if batch:
+        yield batch
+
+
+def merge_results(entries, analysis_results, last_results):
+    """Pair frame entries with their results, in order
+    
+    analysis_results holds one result per entry marked 'analyze'; the others
+    inherit the last result of their video from last_results, which is updated
+    in place.
+    """
+    analysis_results = iter(analysis_results)
+    for entry in entries:
+        if entry['analyze']:
+            result = next(analysis_results)
+        else:
+            result = inherit_result(last_results.get(entry['video_path']))
+        if result:
+            last_results[entry['video_path']] = result
+        yield entry, result
+
+
+def inherit_result(result):
+    """Copy of an analysis result for a frame the motion gate skipped"""
+    if result is None:
+        return None
+    return dict(result, motion_skipped=True)
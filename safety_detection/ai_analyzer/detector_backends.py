@@ -0,0 +1,59 @@
+import os
+from config.model_configs import YOLO_CONFIG
+
+# Inference backends for the CCTV detector. All of them run through Ultralytics,
+# so pre/post-processing (letterbox, NMS, class names) is the same for each.
+PYTORCH = 'pytorch'
+ONNX = 'onnx'
+ONNX_INT8 = 'onnx-int8'
+OPENVINO = 'openvino'
+BACKENDS = [PYTORCH, ONNX, ONNX_INT8, OPENVINO]
+
+def weights_for_backend(model_path, backend=PYTORCH):
+    """Return the weights to load for a backend, exporting them from the .pt file on first use"""
+    if backend == PYTORCH:
+        return str(model_path)
+    
+    base = os.path.splitext(str(model_path))[0]
+    
+    if backend == ONNX:
+        target = base + '.onnx'
+        if not os.path.exists(target):
+            target = _export(model_path, 'onnx')
+    
+    elif backend == ONNX_INT8:
+        target = base + '.int8.onnx'
+        if not os.path.exists(target):
+            # Dynamic (weight-only) quantization needs no calibration data
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+            print(f"Quantizing {model_path} to INT8 ONNX...")
+            quantize_dynamic(weights_for_backend(model_path, ONNX), target, weight_type=QuantType.QUInt8)
+    
+    elif backend == OPENVINO:
+        target = base + '_openvino_model'
+        if not os.path.exists(target):
+            target = _export(model_path, 'openvino')
+    
+    else:
+        raise ValueError(f"Unknown detector backend: {backend} (choose from {', '.join(BACKENDS)})")
+    
+    return str(target)
+
+
+def load_detector(model_path, backend=PYTORCH):
+    """Load an Ultralytics model for the given backend"""
+    from ultralytics import YOLO
+    
+    weights = weights_for_backend(model_path, backend)
+    if backend == PYTORCH:
+        return YOLO(weights)
+    return YOLO(weights, task='detect')
+
+
+def _export(model_path, export_format):
+    """Export PyTorch weights with a dynamic batch dimension so batched inference keeps working"""
+    from ultralytics import YOLO
+    
+    print(f"Exporting {model_path} to {export_format}...")
+    imgsz = YOLO_CONFIG['IMAGE_SIZE']
+    return str(YOLO(str(model_path)).export(format=export_format, dynamic=True, imgsz=imgsz))
\ No newline at end of file
@@ -0,0 +1,66 @@
+import cv2
+import numpy as np
+from collections import deque
+from config.constants import CCTV_SETTINGS
+
+class DuplicateFrameFilter:
+    """Perceptual-hash filter that drops near-identical anomaly frames per camera
+    
+    Each frame is reduced to a 64-bit difference hash (dHash). A frame is only
+    treated as new when its threat level differs from the last stored frame of
+    that camera, or when its hash is more than max_distance bits away from every
+    hash in the camera's window of recently stored frames.
+    """
+    
+    def __init__(self, max_distance=None, window=None, hash_size=8):
+        self.max_distance = max_distance if max_distance is not None else CCTV_SETTINGS['DEDUP_HASH_DISTANCE']
+        self.window = window or CCTV_SETTINGS['DEDUP_WINDOW']
+        self.hash_size = hash_size
+        self.frames_checked = 0
+        self.frames_suppressed = 0
+        self._cameras = {}
+    
+    def is_new_scene(self, camera, frame, threat_level):
+        """Return True if the frame should be stored, remembering it as the camera's latest scene"""
+        self.frames_checked += 1
+        frame_hash = self.frame_hash(frame)
+        state = self._cameras.get(camera)
+        
+        if state is None:
+            state = self._cameras[camera] = {'hashes': deque(maxlen=self.window), 'threat_level': None}
+        elif state['threat_level'] == threat_level and any(
+                hamming_distance(frame_hash, seen) <= self.max_distance for seen in state['hashes']):
+            self.frames_suppressed += 1
+            return False
+        
+        state['hashes'].append(frame_hash)
+        state['threat_level'] = threat_level
+        return True
+    
+    def frame_hash(self, frame):
+        """64-bit dHash: sign of the horizontal gradient of a 9x8 grayscale thumbnail"""
+        if frame.ndim == 3:
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        small = cv2.resize(frame, (self.hash_size + 1, self.hash_size), interpolation=cv2.INTER_AREA)
+        bits = small[:, 1:] > small[:, :-1]
+        return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+    
+    def reset(self, camera=None):
+        """Forget the stored scenes of one camera, or of all cameras"""
+        if camera is None:
+            self._cameras.clear()
+        else:
+            self._cameras.pop(camera, None)
+    
+    def stats(self):
+        """Return how many anomaly frames were checked and suppressed"""
+        return {
+            'frames_checked': self.frames_checked,
+            'frames_suppressed': self.frames_suppressed,
+            'suppress_ratio': self.frames_suppressed / self.frames_checked if self.frames_checked else 0.0
+        }
+
+
+def hamming_distance(a, b):
+    """Number of differing bits between two integer hashes"""
+    return bin(a ^ b).count('1')
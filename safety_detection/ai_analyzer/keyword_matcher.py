@@ -0,0 +1,68 @@
+import re
+import pandas as pd
+
+# Endings a keyword may carry: plurals, past tense, -ing and agent nouns (attacked, rioting, protesters)
+INFLECTIONS = r'(?:s|es|d|ed|ing|ers?)'
+
+class KeywordMatcher:
+    """Find every keyword in a text with one pass of a single compiled regex
+
+    Keywords match whole words, case-insensitively, with an optional inflection
+    (see INFLECTIONS): "fire" matches "fires" and "firing" but not "fireworks".
+    Keywords found inside a longer match (e.g. "crash" in "car crash") are
+    reported as well. aliases maps other words to the keyword they stand for,
+    e.g. compounds and irregular forms such as "gunman" or "knives".
+    """
+
+    def __init__(self, keywords, aliases=None):
+        self.aliases = {alias.lower(): keyword.lower() for alias, keyword in (aliases or {}).items()}
+        self.keywords = {keyword.lower() for keyword in keywords} | set(self.aliases.values())
+        words = self.keywords | set(self.aliases)
+        # Spellings that only occur before an ending ("fir" in "firing", "gunn" in "gunned")
+        self._stems = {stem: word for word in words for stem in self._inflection_stems(word) if stem not in words}
+
+        # Longest first, so a phrase wins over a keyword it contains
+        alternatives = [(word, re.escape(word)) for word in words]
+        alternatives += [(stem, rf'{re.escape(stem)}(?={ending}\b)') for stem, ending in self._stem_endings()]
+        alternatives.sort(key=lambda alternative: len(alternative[0]), reverse=True)
+        pattern = '|'.join(regex for _, regex in alternatives)
+        self.pattern = re.compile(rf'\b({pattern}){INFLECTIONS}?\b', re.IGNORECASE)
+
+        self._contained = {keyword: self._keywords_in(keyword) for keyword in self.keywords}
+
+    def find(self, text):
+        """Set of keywords that appear in text"""
+        return self._expand(self.pattern.findall(text or ''))
+
+    def find_all(self, texts):
+        """Vectorized find() over a pandas Series (or list) of texts; returns a Series of sets"""
+        texts = pd.Series(texts, dtype=object).fillna('')
+        return texts.str.findall(self.pattern).map(self._expand)
+
+    def _expand(self, matches):
+        hits = set()
+        for match in matches:
+            word = self._stems.get(match.lower(), match.lower())
+            hits |= self._contained[self.aliases.get(word, word)]
+        return hits
+
+    def _stem_endings(self):
+        """Each stem with the endings it must be followed by"""
+        for stem, keyword in self._stems.items():
+            yield stem, 'ing' if keyword.endswith('e') else '(?:ing|ed|ers?)'
+
+    def _inflection_stems(self, keyword):
+        """Spellings of keyword before -ing/-ed: a final e is dropped, and a one-syllable
+        word ending in a single vowel and consonant doubles it"""
+        if keyword.endswith('e'):
+            return [keyword[:-1]]
+        last_word = keyword.split()[-1]
+        one_syllable = len(re.findall('[aeiou]+', last_word)) == 1
+        if one_syllable and re.search('(?:^|[^aeiou])[aeiou][b-df-hj-np-tvz]$', last_word):
+            return [keyword + keyword[-1]]
+        return []
+
+    def _keywords_in(self, phrase):
+        """The phrase itself plus every other keyword it contains as a whole word"""
+        return {keyword for keyword in self.keywords
+                if keyword == phrase or re.search(rf'\b{re.escape(keyword)}\b', phrase)}
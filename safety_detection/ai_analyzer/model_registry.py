@@ -0,0 +1,79 @@
+import threading
+from config.model_configs import YOLO_CONFIG, NLP_MODELS
+
+# Models loaded in this process, keyed by (kind, name)
+_models = {}
+_locks = {}
+_registry_lock = threading.Lock()
+
+def get_model(key, loader):
+    """Return the model registered under key, calling loader() on first use in this process"""
+    model = _models.get(key)
+    if model is not None:
+        return model
+    
+    with _registry_lock:
+        lock = _locks.setdefault(key, threading.Lock())
+    
+    # Per-key lock: concurrent callers wait for one load instead of loading twice
+    with lock:
+        model = _models.get(key)
+        if model is None:
+            model = loader()
+            _models[key] = model
+    return model
+
+
+def get_yolo(model_path=None, backend=None, instance=None):
+    """Shared Ultralytics YOLO model for the given weights file and inference backend
+    
+    Callers that run inference concurrently (e.g. an inference thread pool) pass a
+    distinct instance so each gets its own copy of the model.
+    """
+    model_path = str(model_path or YOLO_CONFIG['MODEL_PATH'])
+    backend = backend or YOLO_CONFIG['BACKEND']
+    
+    def load():
+        from .detector_backends import load_detector
+        return load_detector(model_path, backend)
+    
+    return get_model(('yolo', model_path, backend, instance), load)
+
+
+def get_pipeline(task, model_name):
+    """Shared Hugging Face pipeline for the given task and model"""
+    def load():
+        from transformers import pipeline
+        return pipeline(task, model=model_name)
+    
+    return get_model(('pipeline', task, model_name), load)
+
+
+def get_alert_summarizer():
+    """Shared AlertSummarizer instance"""
+    def load():
+        from .alert_summarizer import AlertSummarizer
+        return AlertSummarizer()
+    
+    return get_model(('alert_summarizer',), load)
+
+
+def warm_models(names=('yolo', 'sentiment', 'threat')):
+    """Load the named models now instead of on first request"""
+    loaders = {
+        'yolo': get_yolo,
+        'sentiment': lambda: get_pipeline('sentiment-analysis', NLP_MODELS['SENTIMENT']['model_name']),
+        'threat': lambda: get_pipeline('text-classification', NLP_MODELS['THREAT_CLASSIFICATION']['model_name']),
+        'alert_summarizer': get_alert_summarizer,
+    }
+    for name in names:
+        try:
+            loaders[name]()
+        except Exception as e:
+            print(f"Could not warm model {name}: {e}")
+
+
+def clear_models():
+    """Drop every loaded model, e.g. to free memory"""
+    with _registry_lock:
+        _models.clear()
\ No newline at end of file
@@ -0,0 +1,67 @@
+import cv2
+import numpy as np
+from config.constants import CCTV_SETTINGS
+
+class MotionGate:
+    """Cheap frame-differencing pre-stage that decides whether a frame needs the detector
+    
+    Each frame is downscaled to grayscale and compared against the last frame that
+    was let through. Frames whose changed-pixel fraction stays below min_changed_area
+    are skipped, and callers should reuse the previous analysis result for them.
+    """
+    
+    def __init__(self, pixel_threshold=None, min_changed_area=None, max_skipped=None, width=160):
+        self.pixel_threshold = pixel_threshold if pixel_threshold is not None else CCTV_SETTINGS['MOTION_PIXEL_THRESHOLD']
+        self.min_changed_area = min_changed_area if min_changed_area is not None else CCTV_SETTINGS['MOTION_MIN_AREA']
+        self.max_skipped = max_skipped if max_skipped is not None else CCTV_SETTINGS['MOTION_MAX_SKIPPED']
+        self.width = width
+        self.frames_checked = 0
+        self.frames_skipped = 0
+        self._reference = None
+        self._consecutive_skipped = 0
+    
+    def has_motion(self, frame):
+        """Return True if the frame changed enough to be sent to the detector"""
+        self.frames_checked += 1
+        current = self._prepare(frame)
+        
+        if self._reference is None or self._reference.shape != current.shape:
+            self._accept(current)
+            return True
+        
+        diff = cv2.absdiff(current, self._reference)
+        changed_area = np.count_nonzero(diff > self.pixel_threshold) / diff.size
+        
+        # Force a refresh now and then so a slowly drifting scene is not skipped forever
+        if changed_area >= self.min_changed_area or (self.max_skipped and self._consecutive_skipped >= self.max_skipped):
+            self._accept(current)
+            return True
+        
+        self.frames_skipped += 1
+        self._consecutive_skipped += 1
+        return False
+    
+    def reset(self):
+        """Forget the reference frame, e.g. when switching to another video"""
+        self._reference = None
+        self._consecutive_skipped = 0
+    
+    def stats(self):
+        """Return how many frames were checked and skipped"""
+        return {
+            'frames_checked': self.frames_checked,
+            'frames_skipped': self.frames_skipped,
+            'skip_ratio': self.frames_skipped / self.frames_checked if self.frames_checked else 0.0
+        }
+    
+    def _prepare(self, frame):
+        """Downscale, convert to grayscale and blur to suppress sensor noise"""
+        height = max(1, int(frame.shape[0] * self.width / frame.shape[1]))
+        small = cv2.resize(frame, (self.width, height), interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return cv2.GaussianBlur(small, (5, 5), 0)
+    
+    def _accept(self, current):
+        self._reference = current
+        self._consecutive_skipped = 0
\ No newline at end of file
@@ -1,16 +1,25 @@
-import re
-from transformers import pipeline
+from config.model_configs import NLP_MODELS
+from .keyword_matcher import KeywordMatcher
+from .model_registry import get_pipeline
+
+# Incident types and their keywords, checked in this order
+INCIDENT_KEYWORDS = {
+    'protest': ['protest', 'riot', 'march', 'demonstration'],
+    'violence': ['attack', 'violence', 'fight', 'assault', 'weapon', 'gun'],
+    'accident': ['accident', 'crash', 'collision', 'car crash'],
+    'natural_disaster': ['earthquake', 'flood', 'fire', 'disaster', 'storm'],
+}
+
+# Compounds and irregular forms, reported as the keyword they stand for
+KEYWORD_ALIASES = {
+    'gunfire': 'gun', 'gunman': 'gun', 'gunmen': 'gun', 'gunshot': 'gun', 'shotgun': 'gun', 'firearm': 'gun',
+    'knives': 'knife', 'wildfire': 'fire', 'bushfire': 'fire',
+}
 
 class SocialMediaAnalyzer:
     def __init__(self):
-        self.sentiment_analyzer = pipeline(
-            "sentiment-analysis",
-            model="cardiffnlp/twitter-roberta-base-sentiment-latest"
-        )
-        self.threat_classifier = pipeline(
-            "text-classification",
-            model="cardiffnlp/twitter-roberta-base-offensive"
-        )
+        self.sentiment_model = NLP_MODELS['SENTIMENT']['model_name']
+        self.threat_model = NLP_MODELS['THREAT_CLASSIFICATION']['model_name']
         
         # Threat keywords with weights
         self.threat_keywords = {
@@ -19,6 +28,66 @@ class SocialMediaAnalyzer:
             'crash': 0.5, 'fight': 0.4, 'assault': 0.7, 'weapon': 0.8,
             'gun': 0.9, 'knife': 0.7, 'explosion': 0.9, 'bomb': 0.9
         }
+        
+        # One matcher for both threat scoring and incident classification
+        incident_words = [word for words in INCIDENT_KEYWORDS.values() for word in words]
+        self.keyword_matcher = KeywordMatcher(list(self.threat_keywords) + incident_words, KEYWORD_ALIASES)
+    
+    @property
+    def sentiment_analyzer(self):
+        """Sentiment pipeline shared across the process, loaded on first use"""
+        return get_pipeline("sentiment-analysis", self.sentiment_model)
+    
+    @property
+    def threat_classifier(self):
+        """Offensive-language pipeline shared across the process, loaded on first use"""
+        return get_pipeline("text-classification", self.threat_model)
+    
+    def analyze_batch(self, texts, batch_size=None):
+        """Analyze many texts with batched model calls
+        
+        Returns one dict per text with sentiment, sentiment_score, threat_level,
+        confidence and incident_type, falling back per text like the single-text
+        methods when a model call fails.
+        """
+        truncated = [text[:512] for text in texts]
+        sentiments = self._run_pipeline(self.sentiment_analyzer, truncated,
+                                        batch_size or NLP_MODELS['SENTIMENT']['batch_size'], "Sentiment analysis")
+        threats = self._run_pipeline(self.threat_classifier, truncated,
+                                     batch_size or NLP_MODELS['THREAT_CLASSIFICATION']['batch_size'], "Threat detection")
+        
+        keyword_hits = self.keyword_matcher.find_all(texts).tolist()
+        
+        analyses = []
+        for text, sentiment, threat, hits in zip(texts, sentiments, threats, keyword_hits):
+            threat_level, confidence = self._score_threat(text, threat, hits) if threat else ("LOW", 0.1)
+            analyses.append({
+                'sentiment': sentiment['label'] if sentiment else "NEUTRAL",
+                'sentiment_score': sentiment['score'] if sentiment else 0.5,
+                'threat_level': threat_level,
+                'confidence': confidence,
+                'incident_type': self.classify_incident_type(text, hits),
+            })
+        return analyses
+    
+    def _run_pipeline(self, pipeline, texts, batch_size, task_name):
+        """Top result per text from a batched pipeline call; retries one by one if the batch fails"""
+        if not texts:
+            return []
+        try:
+            results = pipeline(texts, batch_size=batch_size, truncation=True)
+            return [result[0] if isinstance(result, list) else result for result in results]
+        except Exception as e:
+            print(f"{task_name} error on batch of {len(texts)}, retrying individually: {e}")
+        
+        results = []
+        for text in texts:
+            try:
+                results.append(pipeline(text, truncation=True)[0])
+            except Exception as e:
+                print(f"{task_name} error: {e}")
+                results.append(None)
+        return results
     
     def analyze_sentiment(self, text):
         """Analyze sentiment of social media text"""
@@ -34,46 +103,46 @@ class SocialMediaAnalyzer:
         try:
             # Get classifier result
             result = self.threat_classifier(text[:512])[0]
-            text_lower = text.lower()
-            
-            # Base threat score from classifier
-            base_score = result['score'] if result['label'] in ['offensive', 'hate'] else 0.1
-            
-            # Add keyword-based threat score
-            keyword_score = 0
-            for keyword, weight in self.threat_keywords.items():
-                if keyword in text_lower:
-                    keyword_score += weight
+            return self._score_threat(text, result)
             
-            # Normalize keyword score
-            keyword_score = min(1.0, keyword_score * 0.3)
-            
-            # Combine scores
-            threat_score = min(1.0, base_score + keyword_score)
-            
-            # Determine threat level
-            if threat_score > 0.7:
-                return "HIGH", threat_score
-            elif threat_score > 0.4:
-                return "MEDIUM", threat_score
-            else:
-                return "LOW", threat_score
-                
         except Exception as e:
             print(f"Threat detection error: {e}")
             return "LOW", 0.1
     
-    def classify_incident_type(self, text):
-        """Classify the type of incident from text"""
-        text_lower = text.lower()
+    def _score_threat(self, text, result, hits=None):
+        """Combine a classifier result with keyword weights into (threat level, score)"""
+        if hits is None:
+            hits = self.keyword_matcher.find(text)
+        
+        # Base threat score from classifier
+        base_score = result['score'] if result['label'] in ['offensive', 'hate'] else 0.1
         
-        if any(word in text_lower for word in ['protest', 'riot', 'march', 'demonstration']):
-            return 'protest'
-        elif any(word in text_lower for word in ['attack', 'violence', 'fight', 'assault', 'weapon', 'gun']):
-            return 'violence'
-        elif any(word in text_lower for word in ['accident', 'crash', 'collision', 'car crash']):
-            return 'accident'
-        elif any(word in text_lower for word in ['earthquake', 'flood', 'fire', 'disaster', 'storm']):
-            return 'natural_disaster'
+        # Add keyword-based threat score
+        keyword_score = sum(self.threat_keywords.get(keyword, 0) for keyword in hits)
+        
+        # Normalize keyword score
+        keyword_score = min(1.0, keyword_score * 0.3)
+        
+        # Combine scores
+        threat_score = min(1.0, base_score + keyword_score)
+        
+        # Determine threat level
+        if threat_score > 0.7:
+            return "HIGH", threat_score
+        elif threat_score > 0.4:
+            return "MEDIUM", threat_score
         else:
-            return 'other'
\ No newline at end of file
+            return "LOW", threat_score
+    
+    def classify_incident_type(self, text, hits=None):
+        """Classify the type of incident from text
+        
+        hits are the keywords already found in text by keyword_matcher, if known.
+        """
+        if hits is None:
+            hits = self.keyword_matcher.find(text)
+        
+        for incident_type, words in INCIDENT_KEYWORDS.items():
+            if hits.intersection(words):
+                return incident_type
+        return 'other'
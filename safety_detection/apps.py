@@ -1,6 +1,13 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 class SafetyDetectionConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'safety_detection'
-    verbose_name = 'Public Safety Detection'
\ No newline at end of file
+    verbose_name = 'Public Safety Detection'
+
+    def ready(self):
+        # Optionally load the AI models at startup instead of on first use
+        if getattr(settings, 'WARM_AI_MODELS', False):
+            from .ai_analyzer import warm_models
+            warm_models()
\ No newline at end of file
@@ -0,0 +1,68 @@
+import time
+from django.db import transaction
+from config.constants import DB_SETTINGS
+
+class BulkWriter:
+    """Buffer unsaved model instances and insert them with bulk_create
+    
+    Each flush is one transaction. If a bulk insert fails, the batch is retried
+    row by row inside savepoints so a single bad row does not drop the others.
+    """
+    
+    def __init__(self, model, batch_size=None, progress_callback=None):
+        self.model = model
+        self.batch_size = batch_size or DB_SETTINGS['BATCH_SIZE']
+        self.progress_callback = progress_callback
+        self.written = 0
+        self.failed = 0
+        self.last_flush = time.monotonic()
+        self._buffer = []
+    
+    def add(self, instance):
+        """Buffer an instance, flushing once a full batch is waiting"""
+        self._buffer.append(instance)
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+    
+    def flush(self):
+        """Insert all buffered instances and return how many were written"""
+        self.last_flush = time.monotonic()
+        batch, self._buffer = self._buffer, []
+        if not batch:
+            return 0
+        
+        try:
+            with transaction.atomic():
+                self.model.objects.bulk_create(batch, batch_size=self.batch_size)
+            written = len(batch)
+        except Exception as e:
+            print(f"Bulk insert of {len(batch)} {self.model.__name__} rows failed ({e}), retrying row by row")
+            written = self._save_individually(batch)
+        
+        self.written += written
+        if self.progress_callback:
+            self.progress_callback(self.written)
+        return written
+    
+    def flush_if_older_than(self, seconds):
+        """Flush when rows have been waiting longer than the given number of seconds"""
+        if self._buffer and time.monotonic() - self.last_flush >= seconds:
+            return self.flush()
+        return 0
+    
+    def __len__(self):
+        return len(self._buffer)
+    
+    def _save_individually(self, batch):
+        """Save rows one at a time, skipping the ones that fail"""
+        written = 0
+        with transaction.atomic():
+            for instance in batch:
+                try:
+                    with transaction.atomic():
+                        instance.save()
+                    written += 1
+                except Exception as e:
+                    self.failed += 1
+                    print(f"Skipping {self.model.__name__} row: {e}")
+        return written
\ No newline at end of file
@@ -0,0 +1,117 @@
+import time
+from collections import deque
+from config.constants import CCTV_SETTINGS
+
+class CameraScheduler:
+    """Decide which cameras' frames go into each inference batch
+    
+    Every camera has an optional frame budget (analyzed frames per second) and a
+    priority. Both are multiplied by CAMERA_PRIORITY_BOOST for the camera's current
+    threat level, so cameras in a MEDIUM/HIGH state get more of the model. Within
+    the budgets, batches are filled by stride scheduling: the camera that has had
+    the least service relative to its priority goes next, so no source starves.
+    Frames a camera cannot send stay in its FrameQueue, which drops them when full.
+    """
+    
+    def __init__(self, boosts=None, burst_seconds=None, stats_window=None):
+        self.boosts = boosts or CCTV_SETTINGS['CAMERA_PRIORITY_BOOST']
+        self.burst_seconds = burst_seconds or CCTV_SETTINGS['CAMERA_BURST_SECONDS']
+        self.stats_window = stats_window or CCTV_SETTINGS['CAMERA_STATS_WINDOW']
+        self.cameras = {}
+        self._virtual_time = 0.0
+    
+    def add_camera(self, camera, frame_queue, fps_budget=None, priority=1.0):
+        """Register a camera and the FrameQueue its frames arrive in; fps_budget None means unlimited"""
+        self.cameras[camera] = {
+            'queue': frame_queue,
+            'fps_budget': fps_budget,
+            'priority': priority,
+            'threat_level': 'LOW',
+            'tokens': 1.0,
+            'refilled_at': time.monotonic(),
+            'pass': self._virtual_time,
+            'added_at': time.monotonic(),
+            'frames_scheduled': 0,
+            'recent': deque(),
+        }
+    
+    def next_batch(self, batch_size):
+        """Take up to batch_size frames to analyze as a list of (camera, item)
+        
+        Frames already marked analyze=False by a motion gate need no inference, so
+        they are passed through without using budget or batch slots.
+        """
+        now = time.monotonic()
+        for state in self.cameras.values():
+            self._refill(state, now)
+        
+        batch = []
+        analyzed = 0
+        while analyzed < batch_size:
+            ready = [(camera, state) for camera, state in self.cameras.items()
+                     if len(state['queue']) and state['tokens'] >= 1]
+            if not ready:
+                break
+            
+            camera, state = min(ready, key=lambda pair: max(pair[1]['pass'], self._virtual_time))
+            item = state['queue'].get_nowait()
+            if item is None:
+                continue
+            batch.append((camera, item))
+            if not item['analyze']:
+                continue
+            
+            # An idle camera restarts at the current virtual time instead of catching up in a burst
+            state['pass'] = max(state['pass'], self._virtual_time)
+            self._virtual_time = state['pass']
+            state['pass'] += 1.0 / self._weight(state)
+            state['tokens'] -= 1
+            state['frames_scheduled'] += 1
+            state['recent'].append(now)
+            analyzed += 1
+        
+        return batch
+    
+    def record_result(self, camera, analysis_result):
+        """Update a camera's threat state from its latest analysis result"""
+        state = self.cameras.get(camera)
+        if state and analysis_result:
+            state['threat_level'] = analysis_result['threat_level']
+    
+    def stats(self):
+        """Per-camera achieved FPS, budget, state and frames dropped by its queue"""
+        now = time.monotonic()
+        stats = {}
+        for camera, state in self.cameras.items():
+            recent = state['recent']
+            while recent and recent[0] < now - self.stats_window:
+                recent.popleft()
+            window = min(self.stats_window, now - state['added_at'])
+            stats[camera] = {
+                'achieved_fps': len(recent) / window if window > 0 else 0.0,
+                'fps_budget': self._budget(state),
+                'priority': state['priority'],
+                'threat_level': state['threat_level'],
+                'frames_scheduled': state['frames_scheduled'],
+                'frames_dropped': state['queue'].dropped,
+                'queue_depth': len(state['queue']),
+            }
+        return stats
+    
+    def _weight(self, state):
+        return state['priority'] * self.boosts.get(state['threat_level'], 1.0)
+    
+    def _budget(self, state):
+        if state['fps_budget'] is None:
+            return None
+        return state['fps_budget'] * self.boosts.get(state['threat_level'], 1.0)
+    
+    def _refill(self, state, now):
+        """Top up a camera's token bucket for the time since the last refill"""
+        budget = self._budget(state)
+        if budget is None:
+            state['tokens'] = float('inf')
+        else:
+            elapsed = now - state['refilled_at']
+            state['tokens'] = min(max(1.0, budget * self.burst_seconds), state['tokens'] + elapsed * budget)
+        state['refilled_at'] = now
@@ -1,117 +1,668 @@
-import cv2
 import os
-from datetime import datetime
-from django.utils import timezone
-from django.contrib.gis.geos import Point
-from ...models import CCTVAnalysis
-from ..ai_analyzer import CCTVAnalyzer
+import multiprocessing
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+from django import db
+from ..models import CCTVAnalysis
+from ..ai_analyzer import CCTVAnalyzer, DuplicateFrameFilter, MotionGate, get_yolo
+from ..ai_analyzer.cctv_analyzer import merge_results
+from config.constants import CCTV_SETTINGS
+from config.model_configs import YOLO_CONFIG
+from ..ai_analyzer.detector_backends import weights_for_backend
+from ..utils.frame_sampler import create_sampler
+from .bulk_writer import BulkWriter
+from .camera_scheduler import CameraScheduler
+from .frame_writer import FrameImageWriter
+from .event_aggregator import EventAggregator
+from .result_sinks import DetectionSeriesSink, apply_event_totals, build_cctv_analysis, build_cctv_event
+from .cctv_stream import DROP_OLDEST, FrameQueue, StreamReader
+from .video_ledger import VideoLedger
+
+VIDEO_EXTENSIONS = ['.mp4', '.avi', '.mov', '.mkv', '.webm']
+
+# Seconds a stream result may wait in the write buffer before it is committed
+STREAM_WRITE_INTERVAL = 5
+
+# Per-process processor used by pool workers, loaded once by _init_worker
+_worker_processor = None
 
 class CCTVProcessor:
-    def __init__(self, model_path='yolov8n.pt'):
-        self.analyzer = CCTVAnalyzer(model_path)
+    def __init__(self, model_path='yolov8n.pt', batch_size=None, use_motion_gate=False, motion_threshold=None,
+                 motion_min_area=None, use_ledger=False, backend=None, sinks=None, use_dedup=False,
+                 dedup_distance=None, image_format=None, image_quality=None,
+                 aggregate_events=False, frame_details=True, detections_dir=None):
+        self.analyzer = CCTVAnalyzer(model_path, batch_size=batch_size, backend=backend)
+        
+        # Extra result sinks (see result_sinks) that receive every per-frame result
+        self.sinks = list(sinks or [])
+        
+        # With a detection series, boxes live in per-video sidecars and rows keep only the counts
+        self.detection_series = DetectionSeriesSink(detections_dir) if detections_dir else None
+        if self.detection_series:
+            self.sinks.append(self.detection_series)
+        
+        # Ledger of processed files, used to skip finished videos and resume interrupted ones
+        self.ledger = VideoLedger() if use_ledger else None
+        self._videos_to_complete = []
+        
+        # Motion gate settings; a fresh gate is created for every video
+        self.use_motion_gate = use_motion_gate
+        self.motion_threshold = motion_threshold
+        self.motion_min_area = motion_min_area
+        self.motion_stats = {'frames_checked': 0, 'frames_skipped': 0}
+        
+        # Perceptual-hash filter so a long incident stores one frame per distinct scene
+        self.deduplicator = DuplicateFrameFilter(dedup_distance) if use_dedup else None
+        self._duplicate_counts = {}
+        
+        # Consecutive anomalous frames are merged into CCTVEvent rows; per-frame rows become optional
+        self.events = EventAggregator() if aggregate_events else None
+        self.frame_details = frame_details or not aggregate_events
+        self._event_counts = {}
+        self._events_refreshed = time.monotonic()
+        
+        self._anomaly_counts = {}
+        self._last_results = {}
+        self._camera_starts = {}
+        self._stream_stats = {}
+        self._scheduler = None
+        self._pool_local = threading.local()
+        
+        # Anomalous frames are buffered and inserted with bulk_create
+        self.writer = BulkWriter(CCTVAnalysis)
+        
+        # Frame images are encoded and written in the background, one writer per output directory.
+        # Sampled frames are already downscaled to MAX_FRAME_SIZE by prepare_frame()
+        self.image_format = image_format
+        self.image_quality = image_quality
+        self._image_writers = {}
+    
+    def process_video_file(self, video_path, location=None, output_dir=None, frame_interval=30,
+                           seconds_interval=None, adaptive_interval=None, camera_started_at=None):
+        """Process a single video file and store analysis results
+        
+        Frames are sampled every frame_interval frames, or every seconds_interval
+        seconds when given. With adaptive_interval=(min_interval, max_interval),
+        sampling densifies while the threat score is high and thins out again when
+        it drops. Rows record their frame number and media time; with
+        camera_started_at (the wall-clock time of the first frame) they are
+        timestamped in real time.
+        """
+        if camera_started_at:
+            self._camera_starts[video_path] = camera_started_at
+        self._process_videos([video_path], location, output_dir, frame_interval, seconds_interval, adaptive_interval)
+        
+        processed_count = self._finish_source(video_path)
+        print(f"Processed {processed_count} anomalous frames from {video_path}")
+        return processed_count
+    
+    def process_directory(self, directory_path, location=None, output_dir=None, frame_interval=30,
+                          seconds_interval=None, adaptive_interval=None):
+        """Process all video files in a directory, batching frames across videos"""
+        video_paths = list_video_files(directory_path)
+        self._process_videos(video_paths, location, output_dir, frame_interval, seconds_interval, adaptive_interval)
+        
+        processed_files = 0
+        for file_path in video_paths:
+            count = self._finish_source(file_path)
+            print(f"Processed {count} anomalous frames from {file_path}")
+            processed_files += count
+        
+        print(f"Completed processing directory. Processed {processed_files} anomalous frames.")
+        return processed_files
     
-    def process_video_file(self, video_path, location=None, output_dir=None, frame_interval=30):
-        """Process a single video file and store analysis results"""
+    def _process_videos(self, video_paths, location, output_dir, frame_interval, seconds_interval, adaptive_interval):
+        """Run the videos' frames through CCTVAnalyzer.iter_analyzed() and store the results
+        
+        The videos feed one stream of frames, so a batch can span the end of one
+        video and the start of the next.
+        """
+        if output_dir and not os.path.exists(output_dir):
+            os.makedirs(output_dir)
+        
+        entries = (entry for video_path in video_paths
+                   for entry in self._video_entries(video_path, location, output_dir, frame_interval, seconds_interval,
+                                                    adaptive_interval))
         try:
-            if not os.path.exists(video_path):
-                print(f"Video file not found: {video_path}")
-                return 0
-            
-            cap = cv2.VideoCapture(video_path)
-            frame_count = 0
-            processed_count = 0
-            
-            # Create output directory if specified
-            if output_dir and not os.path.exists(output_dir):
-                os.makedirs(output_dir)
-            
-            while cap.isOpened():
-                ret, frame = cap.read()
-                if not ret:
+            current_video = None
+            for entry, analysis_result in self.analyzer.iter_analyzed(entries):
+                # Results arrive in video order, so a new path means the previous video is finished
+                if entry['video_path'] != current_video:
+                    if current_video is not None:
+                        self._close_event(current_video)
+                    current_video = entry['video_path']
+                self._handle_result(entry, analysis_result)
+                if entry['checkpoint']:
+                    self._checkpoint(entry['video_path'], entry['frame_number'])
+        except Exception as e:
+            # Results of finished videos may still have been in flight, so none is marked done
+            print(f"Error processing videos: {e}")
+            self._videos_to_complete = []
+        
+        self.store_pending()
+        for video_path in video_paths:
+            self._close_event(video_path)
+        self._complete_videos()
+        self._close_image_writers()
+    
+    def _video_entries(self, video_path, location, output_dir, frame_interval, seconds_interval, adaptive_interval):
+        """Frame entries of one video, starting where the ledger left off; an error ends only this video"""
+        if not os.path.exists(video_path):
+            print(f"Video file not found: {video_path}")
+            return
+        
+        start_frame = 0
+        if self.ledger:
+            start_frame = self.ledger.start(video_path)
+            if start_frame is None:
+                print(f"Skipping {video_path}, already processed")
+                return
+            if start_frame:
+                print(f"Resuming {video_path} from frame {start_frame}")
+        
+        print(f"Processing {os.path.basename(video_path)}...")
+        self._anomaly_counts.setdefault(video_path, 0)
+        if self.detection_series:
+            self.detection_series.start_video(video_path, start_frame)
+        motion_gate = None
+        if self.use_motion_gate:
+            motion_gate = MotionGate(self.motion_threshold, self.motion_min_area)
+        sampler = create_sampler(video_path, frame_interval, seconds_interval, adaptive_interval, start_frame)
+        
+        try:
+            for sampled_count, entry in enumerate(self.analyzer.sample_frames(sampler, motion_gate), 1):
+                entry.update(location=location, output_dir=output_dir, captured_at=None,
+                             checkpoint=bool(self.ledger) and sampled_count % CCTV_SETTINGS['CHECKPOINT_INTERVAL'] == 0)
+                yield entry
+        except Exception as e:
+            print(f"Error processing video file {video_path}: {e}")
+            return
+        
+        if motion_gate:
+            self._record_motion_stats(video_path, motion_gate)
+        
+        # A file that yielded no frames is left open in the ledger so a later run retries it
+        if self.ledger and (sampler.frames_retrieved or start_frame):
+            self._videos_to_complete.append(video_path)
+        elif self.ledger:
+            print(f"No frames could be read from {video_path}, not marking it as processed")
+    
+    def process_streams(self, sources, location=None, output_dir=None, sample_seconds=1.0, queue_size=8,
+                        drop_policy=DROP_OLDEST, stats_interval=30, duration=None, fps_budget=None,
+                        camera_budgets=None, camera_priorities=None, inference_workers=1):
+        """Continuously analyze live sources until they end, duration elapses or Ctrl+C
+        
+        Each source is decoded by its own StreamReader thread into a bounded
+        FrameQueue, so a slow model drops frames instead of falling behind. A
+        CameraScheduler fills each batch within per-camera frame budgets
+        (camera_budgets, defaulting to fps_budget; None is unlimited) and
+        priorities, and batches run on inference_workers model copies at once.
+        """
+        if output_dir and not os.path.exists(output_dir):
+            os.makedirs(output_dir)
+        
+        camera_budgets = camera_budgets or {}
+        camera_priorities = camera_priorities or {}
+        self._scheduler = CameraScheduler()
+        
+        readers = []
+        for source in sources:
+            motion_gate = None
+            if self.use_motion_gate:
+                motion_gate = MotionGate(self.motion_threshold, self.motion_min_area)
+            reader = StreamReader(source, FrameQueue(queue_size, drop_policy), sample_seconds, motion_gate=motion_gate)
+            self._scheduler.add_camera(source, reader.frame_queue, camera_budgets.get(source, fps_budget),
+                                       camera_priorities.get(source, 1.0))
+            self._anomaly_counts.setdefault(source, 0)
+            if self.detection_series:
+                # Appended to: stream frame numbers restart every run, but their timestamps do not
+                self.detection_series.start_video(source)
+            self._stream_stats[source] = {'frames_analyzed': 0, 'last_lag': 0.0, 'max_lag': 0.0, 'total_lag': 0.0}
+            readers.append(reader)
+            reader.start()
+        
+        pool = None
+        if inference_workers > 1:
+            pool = ThreadPoolExecutor(max_workers=inference_workers, thread_name_prefix='cctv-inference')
+        in_flight = deque()
+        
+        started = time.monotonic()
+        last_report = started
+        
+        try:
+            while in_flight or any(not reader.stopped or len(reader.frame_queue) for reader in readers):
+                if duration and time.monotonic() - started >= duration:
                     break
                 
-                # Process every nth frame
-                if frame_count % frame_interval == 0:
-                    # Save frame temporarily
-                    temp_frame_path = f"temp_frame_{frame_count}.jpg"
-                    cv2.imwrite(temp_frame_path, frame)
-                    
-                    # Analyze frame
-                    analysis_result = self.analyzer.analyze_video_frame(temp_frame_path)
+                # Keep every inference worker busy with its own batch
+                scheduled = False
+                while len(in_flight) < inference_workers:
+                    batch = self._scheduler.next_batch(self.analyzer.batch_size)
+                    if not batch:
+                        break
+                    scheduled = True
                     
-                    if analysis_result and analysis_result['anomaly_detected']:
-                        # Save frame image if output directory specified
-                        frame_filename = None
-                        if output_dir:
-                            frame_filename = f"frame_{frame_count}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jpg"
-                            frame_path = os.path.join(output_dir, frame_filename)
-                            cv2.imwrite(frame_path, frame)
-                            frame_filename = f"cctv_frames/{os.path.basename(frame_path)}"
-                        
-                        # Create CCTV analysis record
-                        cctv_analysis = CCTVAnalysis(
-                            video_path=video_path,
-                            frame_image=frame_filename or '',
-                            timestamp=timezone.now(),
-                            location=location,
-                            crowd_density=analysis_result['crowd_density'],
-                            anomaly_detected=analysis_result['anomaly_detected'],
-                            detected_objects=analysis_result['detections'],
-                            threat_level=analysis_result['threat_level']
-                        )
-                        cctv_analysis.save()
-                        processed_count += 1
-                    
-                    # Clean up temp file
-                    if os.path.exists(temp_frame_path):
-                        os.remove(temp_frame_path)
+                    # Live sources have no media position, so rows are stamped with the capture time instead
+                    entries = [self._frame_entry(source, item['frame_number'], item['frame'], location, output_dir,
+                                                 item['analyze'], transform=item['transform'],
+                                                 captured_at=item['captured_at'])
+                               for source, item in batch]
+                    frames = [entry['frame'] for entry in entries if entry['analyze']]
+                    transforms = [entry['transform'] for entry in entries if entry['analyze']]
+                    if pool:
+                        in_flight.append((batch, entries, pool.submit(self._analyze_in_pool, frames, transforms)))
+                    else:
+                        self._store_stream_batch(batch, entries, self.analyzer.analyze_frames(frames, None, transforms))
                 
-                frame_count += 1
-            
-            cap.release()
-            print(f"Processed {processed_count} anomalous frames from {video_path}")
-            return processed_count
-            
+                # Store results in submission order so each camera's frames stay in sequence
+                if in_flight and in_flight[0][2].done():
+                    batch, entries, future = in_flight.popleft()
+                    self._store_stream_batch(batch, entries, future.result())
+                elif in_flight:
+                    wait([in_flight[0][2]], timeout=0.01)
+                elif not scheduled:
+                    time.sleep(0.01)
+                
+                if time.monotonic() - last_report >= stats_interval:
+                    self._report_stream_stats(readers)
+                    last_report = time.monotonic()
+        
+        except KeyboardInterrupt:
+            print("Stopping streams...")
+        
+        finally:
+            for reader in readers:
+                reader.stop()
+            while in_flight:
+                batch, entries, future = in_flight.popleft()
+                self._store_stream_batch(batch, entries, future.result())
+            if pool:
+                pool.shutdown(wait=True)
+            self.store_pending()
+            for reader in readers:
+                self._close_event(reader.source)
+            self._close_image_writers()
+            self._report_stream_stats(readers)
+        
+        processed_count = 0
+        for reader in readers:
+            processed_count += self._finish_source(reader.source)
+        
+        print(f"Stream processing stopped. Processed {processed_count} anomalous frames.")
+        return processed_count
+    
+    def get_stream_stats(self, readers):
+        """Per-source stream metrics: read/queued/dropped/analyzed frames and lag in seconds"""
+        stats = {}
+        for reader in readers:
+            stream_stats = self._stream_stats.get(reader.source, {})
+            analyzed = stream_stats.get('frames_analyzed', 0)
+            stats[reader.source] = {
+                'frames_read': reader.stats['frames_read'],
+                'frames_queued': reader.stats['frames_queued'],
+                'frames_dropped': reader.frame_queue.dropped,
+                'frames_analyzed': analyzed,
+                'queue_depth': len(reader.frame_queue),
+                'reconnects': reader.stats['reconnects'],
+                'last_lag': stream_stats.get('last_lag', 0.0),
+                'max_lag': stream_stats.get('max_lag', 0.0),
+                'avg_lag': stream_stats.get('total_lag', 0.0) / analyzed if analyzed else 0.0,
+                'motion_skipped': reader.motion_gate.frames_skipped if reader.motion_gate else 0,
+            }
+            if self._scheduler and reader.source in self._scheduler.cameras:
+                camera_stats = self._scheduler.stats()[reader.source]
+                stats[reader.source].update({
+                    'achieved_fps': camera_stats['achieved_fps'],
+                    'fps_budget': camera_stats['fps_budget'],
+                    'threat_level': camera_stats['threat_level'],
+                })
+        return stats
+    
+    def _analyze_in_pool(self, frames, transforms):
+        """Run inference on an inference pool thread, with a model copy private to that thread"""
+        analyzer = getattr(self._pool_local, 'analyzer', None)
+        if analyzer is None:
+            analyzer = CCTVAnalyzer(self.analyzer.model_path, self.analyzer.batch_size, self.analyzer.backend,
+                                    instance=threading.current_thread().name)
+            self._pool_local.analyzer = analyzer
+        return analyzer.analyze_frames(frames, None, transforms)
+    
+    def _store_stream_batch(self, batch, entries, analysis_results):
+        """Store one analyzed stream batch and update the cameras' scheduling state"""
+        for entry, analysis_result in merge_results(entries, analysis_results, self._last_results):
+            self._handle_result(entry, analysis_result)
+        for source in set(source for source, item in batch):
+            self._scheduler.record_result(source, self._last_results.get(source))
+        self.writer.flush_if_older_than(STREAM_WRITE_INTERVAL)
+        if self.events and time.monotonic() - self._events_refreshed >= STREAM_WRITE_INTERVAL:
+            self._refresh_open_events()
+            self._events_refreshed = time.monotonic()
+        self._record_stream_lag(batch)
+    
+    def _record_stream_lag(self, batch):
+        """Update per-source lag between frame capture and stored result"""
+        finished_at = time.time()
+        for source, item in batch:
+            lag = finished_at - item['captured_at']
+            stream_stats = self._stream_stats[source]
+            stream_stats['frames_analyzed'] += 1
+            stream_stats['last_lag'] = lag
+            stream_stats['max_lag'] = max(stream_stats['max_lag'], lag)
+            stream_stats['total_lag'] += lag
+    
+    def _report_stream_stats(self, readers):
+        for source, stats in self.get_stream_stats(readers).items():
+            print(f"{source}: analyzed {stats['frames_analyzed']} ({stats.get('achieved_fps', 0.0):.1f} fps, "
+                  f"{stats.get('threat_level', 'LOW')}), dropped {stats['frames_dropped']}, "
+                  f"queue {stats['queue_depth']}, lag {stats['last_lag']:.2f}s (avg {stats['avg_lag']:.2f}s, "
+                  f"max {stats['max_lag']:.2f}s)")
+    
+    def store_pending(self):
+        """Commit the buffered results once their frame images have been written"""
+        for image_writer in self._image_writers.values():
+            image_writer.wait()
+        self.writer.flush()
+    
+    def _handle_result(self, entry, analysis_result):
+        """Pass an analyzed frame to the sinks and events, and store it if it is anomalous"""
+        if not analysis_result:
+            return
+        
+        self._write_to_sinks(entry, analysis_result)
+        if self.events:
+            self._update_event(entry, analysis_result)
+        
+        if not analysis_result['anomaly_detected'] or self._is_duplicate(entry, analysis_result):
+            return
+        try:
+            if self.frame_details:
+                self._save_analysis(entry, analysis_result)
+            self._anomaly_counts[entry['video_path']] = self._anomaly_counts.get(entry['video_path'], 0) + 1
         except Exception as e:
-            print(f"Error processing video file {video_path}: {e}")
-            return 0
+            print(f"Error saving analysis for {entry['video_path']} frame {entry['frame_number']}: {e}")
     
-    def process_directory(self, directory_path, location=None, output_dir=None):
-        """Process all video files in a directory"""
-        video_extensions = ['.mp4', '.avi', '.mov', '.mkv', '.webm']
-        processed_files = 0
+    def _is_duplicate(self, entry, analysis_result):
+        """Check an anomalous frame against the camera's recently stored scenes"""
+        if self.deduplicator is None:
+            return False
+        if self.deduplicator.is_new_scene(entry['video_path'], entry['frame'], analysis_result['threat_level']):
+            return False
         
-        for filename in os.listdir(directory_path):
-            file_path = os.path.join(directory_path, filename)
-            if any(filename.lower().endswith(ext) for ext in video_extensions):
-                print(f"Processing {filename}...")
-                count = self.process_video_file(file_path, location, output_dir)
-                processed_files += count
+        self._duplicate_counts[entry['video_path']] = self._duplicate_counts.get(entry['video_path'], 0) + 1
+        return True
+    
+    def _update_event(self, entry, analysis_result):
+        """Extend or close the video's current event with the next result
         
-        print(f"Completed processing directory. Processed {processed_files} anomalous frames.")
-        return processed_files
+        A new event is saved as soon as it opens, so its frame rows can reference
+        it and be written as they arrive; its totals are updated when it closes.
+        """
+        context = {'location': entry['location'], 'output_dir': entry['output_dir']}
+        closed = self.events.update(entry['video_path'], entry['frame_number'], entry['timestamp'], analysis_result,
+                                    entry['frame'], context, self._recorded_at(entry))
+        if closed:
+            self._save_event(closed)
+        
+        event = self.events.open_event(entry['video_path'])
+        if event and event['record'] is None:
+            try:
+                event['record'] = build_cctv_event(event, '', context['location'])
+                event['record'].save()
+                self._event_counts[entry['video_path']] = self._event_counts.get(entry['video_path'], 0) + 1
+            except Exception as e:
+                event['record'] = None
+                print(f"Error saving event for {entry['video_path']} frame {entry['frame_number']}: {e}")
+    
+    def _close_event(self, video_path):
+        """Close the event still open at the end of a video"""
+        event = self.events.close(video_path) if self.events else None
+        if event:
+            self._save_event(event)
+            self.store_pending()
+    
+    def _save_event(self, event):
+        """Store a closed event's final totals and its representative frame image"""
+        if event['record'] is None:
+            return
+        try:
+            context = event['context']
+            frame_image = event['frame_image']
+            if not frame_image and context['output_dir'] and event['frame'] is not None:
+                frame_image = self._image_writer(context['output_dir']).submit(event['video_path'],
+                                                                              event['representative_frame'],
+                                                                              event['frame'])
+            apply_event_totals(event['record'], event, frame_image)
+            event['record'].save()
+        except Exception as e:
+            print(f"Error saving event for {event['video_path']} frames {event['start_frame']}-{event['end_frame']}: {e}")
+    
+    def _refresh_open_events(self, video_path=None):
+        """Write the running totals of open events (of one video, if given) to their rows"""
+        for event in self.events.open_events() if self.events else []:
+            if event['record'] is None or video_path not in (None, event['video_path']):
+                continue
+            try:
+                apply_event_totals(event['record'], event)
+                event['record'].save()
+            except Exception as e:
+                print(f"Error updating event for {event['video_path']} from frame {event['start_frame']}: {e}")
+    
+    def _finish_source(self, video_path):
+        """Drop per-video state once all of its frames are stored and return its anomaly count"""
+        self._last_results.pop(video_path, None)
+        self._camera_starts.pop(video_path, None)
+        if self.detection_series:
+            self.detection_series.close_video(video_path)
+        events = self._event_counts.pop(video_path, 0)
+        if self.events:
+            print(f"Recorded {events} anomaly events from {video_path}")
+        if self.deduplicator:
+            self.deduplicator.reset(video_path)
+            duplicates = self._duplicate_counts.pop(video_path, 0)
+            if duplicates:
+                print(f"Suppressed {duplicates} near-duplicate anomalous frames from {video_path}")
+        return self._anomaly_counts.pop(video_path, 0)
+    
+    def _frame_entry(self, video_path, frame_number, frame, location, output_dir, analyze=True, timestamp=None,
+                     transform=None, captured_at=None):
+        return {
+            'video_path': video_path,
+            'frame_number': frame_number,
+            'timestamp': timestamp,
+            'captured_at': captured_at,
+            'frame': frame,
+            'transform': transform,
+            'location': location,
+            'output_dir': output_dir,
+            'analyze': analyze,
+        }
+    
+    def _write_to_sinks(self, entry, analysis_result):
+        """Pass a per-frame result to the extra sinks as soon as it is produced"""
+        if not self.sinks:
+            return
+        
+        timestamp = entry['timestamp'] if entry['timestamp'] is not None else entry['captured_at']
+        record = dict(analysis_result, video_path=entry['video_path'], frame_number=entry['frame_number'],
+                      timestamp=timestamp)
+        for sink in self.sinks:
+            sink.write(record)
+    
+    def _checkpoint(self, video_path, frame_number):
+        """Store everything analyzed so far and record the video's progress in the ledger
+        
+        An event still open is stored with its totals so far; a resumed run starts
+        a new event for the rest of the incident.
+        """
+        self.store_pending()
+        self._refresh_open_events(video_path)
+        if self.detection_series:
+            self.detection_series.flush_video(video_path)
+        self.ledger.checkpoint(video_path, frame_number)
+    
+    def _complete_videos(self):
+        """Mark videos whose frames have all been analyzed and stored as done"""
+        for video_path in self._videos_to_complete:
+            self.ledger.complete(video_path)
+        self._videos_to_complete = []
+    
+    def _record_motion_stats(self, video_path, motion_gate):
+        """Add a video's motion gate counters to the processor totals"""
+        stats = motion_gate.stats()
+        self.motion_stats['frames_checked'] += stats['frames_checked']
+        self.motion_stats['frames_skipped'] += stats['frames_skipped']
+        print(f"Motion gate skipped {stats['frames_skipped']} of {stats['frames_checked']} sampled frames from {video_path}")
+    
+    def _save_analysis(self, entry, analysis_result):
+        """Store an anomalous frame result, saving the frame image if requested"""
+        frame_filename = ''
+        if entry['output_dir']:
+            frame_filename = self._image_writer(entry['output_dir']).submit(entry['video_path'], entry['frame_number'],
+                                                                            entry['frame'])
+        
+        if self.detection_series:
+            detections = {key: value for key, value in analysis_result['detections'].items() if key != 'objects'}
+            detections['series'] = self.detection_series.path_for(entry['video_path'])
+            analysis_result = dict(analysis_result, detections=detections)
+        
+        # Stream frame numbers count frames since the reader (re)connected and cannot be
+        # seeked back to, so only the capture time is stored for live sources
+        frame_number = entry['frame_number'] if entry['captured_at'] is None else None
+        cctv_analysis = build_cctv_analysis(entry['video_path'], frame_filename, entry['location'], analysis_result,
+                                            frame_number, entry['timestamp'],
+                                            self._camera_starts.get(entry['video_path']), self._recorded_at(entry))
+        
+        # Rows of an open event are linked to its saved row
+        event = self.events.open_event(entry['video_path']) if self.events else None
+        if event:
+            if event['representative_frame'] == entry['frame_number']:
+                event['frame_image'] = frame_filename
+            cctv_analysis.event = event['record']
+        
+        # Buffer the CCTV analysis record for the next bulk insert
+        self.writer.add(cctv_analysis)
+    
+    def _recorded_at(self, entry):
+        """Wall-clock time of a frame: its capture time for streams, else the camera start plus media time"""
+        if entry['captured_at'] is not None:
+            return datetime.fromtimestamp(entry['captured_at'], tz=timezone.utc)
+        camera_started_at = self._camera_starts.get(entry['video_path'])
+        if camera_started_at is not None and entry['timestamp'] is not None:
+            return camera_started_at + timedelta(seconds=entry['timestamp'])
+        return None
+    
+    def _image_writer(self, output_dir):
+        image_writer = self._image_writers.get(output_dir)
+        if image_writer is None:
+            image_writer = FrameImageWriter(output_dir, self.image_format, self.image_quality)
+            self._image_writers[output_dir] = image_writer
+        return image_writer
+    
+    def _close_image_writers(self):
+        """Stop the image writer threads at the end of a run; later images start new writers"""
+        for image_writer in self._image_writers.values():
+            image_writer.close()
+        self._image_writers = {}
     
-    def process_single_frame(self, image_path, location=None):
-        """Process a single image frame"""
+    def process_single_frame(self, image_path, location=None, defer_write=False):
+        """Process a single image frame
+        
+        With defer_write=True the record is only buffered; call writer.flush()
+        after a run of frames to insert them in one transaction.
+        """
         try:
             analysis_result = self.analyzer.analyze_video_frame(image_path)
             
             if analysis_result:
-                cctv_analysis = CCTVAnalysis(
-                    video_path=image_path,
-                    frame_image=image_path,
-                    timestamp=timezone.now(),
-                    location=location,
-                    crowd_density=analysis_result['crowd_density'],
-                    anomaly_detected=analysis_result['anomaly_detected'],
-                    detected_objects=analysis_result['detections'],
-                    threat_level=analysis_result['threat_level']
-                )
-                cctv_analysis.save()
+                cctv_analysis = build_cctv_analysis(image_path, image_path, location, analysis_result)
+                self.writer.add(cctv_analysis)
+                if not defer_write:
+                    self.writer.flush()
                 return cctv_analysis
             
             return None
             
         except Exception as e:
             print(f"Error processing single frame {image_path}: {e}")
-            return None
\ No newline at end of file
+            return None
+
+
+def list_video_files(directory_path):
+    """Return the paths of all video files directly inside a directory"""
+    return [
+        os.path.join(directory_path, filename)
+        for filename in sorted(os.listdir(directory_path))
+        if any(filename.lower().endswith(ext) for ext in VIDEO_EXTENSIONS)
+    ]
+
+
+def process_videos_parallel(video_paths, workers, model_path='yolov8n.pt', batch_size=None,
+                            location=None, output_dir=None, frame_interval=30, progress_callback=None,
+                            seconds_interval=None, processor_options=None, adaptive_interval=None):
+    """Process videos across a pool of worker processes, each loading the model once
+    
+    Returns a dict mapping video path to its anomalous frame count. progress_callback,
+    if given, is called as progress_callback(done, total, video_path, count) per file.
+    processor_options are extra CCTVProcessor keyword arguments (e.g. motion gating).
+    """
+    if output_dir and not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+    
+    # Export backend weights once here rather than racing to do it in every worker
+    weights_for_backend(model_path, (processor_options or {}).get('backend') or YOLO_CONFIG['BACKEND'])
+    
+    # Workers must open their own database connections
+    db.connections.close_all()
+    
+    # Fork keeps the configured Django app registry; fall back to the platform default
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context('fork' if 'fork' in methods else None)
+    
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker,
+                             initargs=(model_path, batch_size, workers, processor_options or {})) as executor:
+        futures = {
+            executor.submit(_process_video_in_worker, video_path, location, output_dir, frame_interval,
+                            seconds_interval, adaptive_interval): video_path
+            for video_path in video_paths
+        }
+        
+        for future in as_completed(futures):
+            video_path = futures[future]
+            try:
+                count = future.result()
+            except Exception as e:
+                print(f"Worker failed on {video_path}: {e}")
+                count = 0
+            
+            results[video_path] = count
+            if progress_callback:
+                progress_callback(len(results), len(video_paths), video_path, count)
+    
+    return results
+
+
+def _init_worker(model_path, batch_size, workers, processor_options):
+    """Load the model once per worker and split CPU threads between workers"""
+    global _worker_processor
+    
+    import django
+    django.setup()
+    
+    try:
+        import torch
+        torch.set_num_threads(max(1, (os.cpu_count() or 1) // workers))
+    except ImportError:
+        pass
+    
+    _worker_processor = CCTVProcessor(model_path, batch_size=batch_size, **processor_options)
+    get_yolo(model_path, processor_options.get('backend'))
+
+
+def _process_video_in_worker(video_path, location, output_dir, frame_interval, seconds_interval, adaptive_interval):
+    """Process one video with this worker's processor"""
+    return _worker_processor.process_video_file(video_path, location, output_dir, frame_interval,
+                                                seconds_interval=seconds_interval, adaptive_interval=adaptive_interval)
@@ -0,0 +1,135 @@
+import cv2
+import os
+import threading
+import time
+from collections import deque
+from ..utils.frame_preprocess import prepare_frame
+
+DROP_OLDEST = 'oldest'
+DROP_NEWEST = 'newest'
+
+class FrameQueue:
+    """Bounded frame queue that drops frames instead of blocking the reader
+    
+    With DROP_OLDEST a full queue discards its oldest frame to make room, keeping
+    inference close to real time. With DROP_NEWEST the incoming frame is discarded.
+    """
+    
+    def __init__(self, maxsize=8, drop_policy=DROP_OLDEST):
+        if drop_policy not in (DROP_OLDEST, DROP_NEWEST):
+            raise ValueError(f"Unknown drop policy: {drop_policy}")
+        self.maxsize = maxsize
+        self.drop_policy = drop_policy
+        self.dropped = 0
+        self._items = deque()
+        self._lock = threading.Lock()
+    
+    def put(self, item):
+        """Add an item, dropping one according to the policy if the queue is full"""
+        with self._lock:
+            if len(self._items) >= self.maxsize:
+                self.dropped += 1
+                if self.drop_policy == DROP_NEWEST:
+                    return False
+                self._items.popleft()
+            self._items.append(item)
+            return True
+    
+    def get_nowait(self):
+        """Return the oldest item, or None if the queue is empty"""
+        with self._lock:
+            return self._items.popleft() if self._items else None
+    
+    def __len__(self):
+        return len(self._items)
+
+
+class StreamReader(threading.Thread):
+    """Background thread that decodes one continuous source into a FrameQueue
+    
+    Sources can be RTSP/HTTP URLs or local files. Local files are replayed at
+    their native frame rate as a stand-in for a live camera. Every frame is pulled
+    off the source so it never falls behind, but only one frame every
+    sample_seconds is retrieved and queued.
+    """
+    
+    def __init__(self, source, frame_queue, sample_seconds=1.0, reconnect_delay=2.0, motion_gate=None):
+        super().__init__(daemon=True, name=f"stream-reader:{source}")
+        self.source = source
+        self.frame_queue = frame_queue
+        self.sample_seconds = sample_seconds
+        self.reconnect_delay = reconnect_delay
+        self.motion_gate = motion_gate
+        self.is_file = os.path.exists(source)
+        self.stats = {
+            'frames_read': 0,
+            'frames_queued': 0,
+            'reconnects': 0,
+        }
+        self._stop_event = threading.Event()
+    
+    def stop(self):
+        self._stop_event.set()
+    
+    @property
+    def stopped(self):
+        return self._stop_event.is_set()
+    
+    def run(self):
+        delay = self.reconnect_delay
+        while not self.stopped:
+            cap = cv2.VideoCapture(self.source)
+            if not cap.isOpened():
+                print(f"Could not open stream {self.source}, retrying in {delay:.0f}s")
+            else:
+                delay = self.reconnect_delay
+                self._read_until_failure(cap)
+            cap.release()
+            
+            # A replayed file has ended; a live source is reconnected with backoff
+            if self.is_file or self.stopped:
+                break
+            self.stats['reconnects'] += 1
+            self._stop_event.wait(delay)
+            delay = min(delay * 2, 30.0)
+        
+        self._stop_event.set()
+    
+    def _read_until_failure(self, cap):
+        """Read frames until the source fails or the reader is stopped"""
+        fps = cap.get(cv2.CAP_PROP_FPS) or 0
+        frame_period = 1.0 / fps if self.is_file and fps > 0 else 0
+        started = time.monotonic()
+        frame_number = 0
+        next_sample = 0.0
+        
+        while not self.stopped:
+            if not cap.grab():
+                return
+            
+            now = time.monotonic()
+            self.stats['frames_read'] += 1
+            
+            if now >= next_sample:
+                ret, frame = cap.retrieve()
+                if ret:
+                    # Downscale on this thread so only the small copy is queued
+                    frame, transform = prepare_frame(frame)
+                    analyze = self.motion_gate is None or self.motion_gate.has_motion(frame)
+                    self.frame_queue.put({
+                        'frame_number': frame_number,
+                        'captured_at': time.time(),
+                        'frame': frame,
+                        'transform': transform,
+                        'analyze': analyze,
+                    })
+                    self.stats['frames_queued'] += 1
+                next_sample = now + self.sample_seconds
+            
+            frame_number += 1
+            
+            # Pace file replay to real time
+            if frame_period:
+                wait = started + frame_number * frame_period - time.monotonic()
+                if wait > 0:
+                    self._stop_event.wait(wait)
\ No newline at end of file
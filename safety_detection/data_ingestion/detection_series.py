@@ -0,0 +1,175 @@
+import json
+import os
+import numpy as np
+from ..utils.helpers import source_digest
+
+# One row per analyzed frame; boxes of frame i are boxes[first_box:first_box + box_count].
+# timestamp is float64 because streams record epoch seconds, which float32 resolves only to ~2 minutes
+FRAME_DTYPE = np.dtype([
+    ('frame_number', '<i4'),
+    ('timestamp', '<f8'),
+    ('people', '<u2'),
+    ('vehicles', '<u2'),
+    ('weapons', '<u2'),
+    ('fire', '<u2'),
+    ('threat_score', '<f4'),
+    ('anomaly_detected', 'u1'),
+    ('first_box', '<i8'),
+    ('box_count', '<u2'),
+])
+
+# One row per detected object: class id into the series' class list, float16 confidence and xyxy box
+BOX_DTYPE = np.dtype([
+    ('class_id', 'u1'),
+    ('confidence', '<f2'),
+    ('bbox', '<f2', (4,)),
+])
+
+def series_path(directory, video_path):
+    """Sidecar directory for a video: its file name plus a short hash of the full path"""
+    return os.path.join(directory, f"{os.path.basename(video_path)}.{source_digest(video_path)}")
+
+
+def pack_boxes(objects, class_ids):
+    """Pack a result's detections['objects'] into a BOX_DTYPE array; class_ids maps class name to id"""
+    boxes = np.zeros(len(objects), dtype=BOX_DTYPE)
+    if objects:
+        boxes['class_id'] = [class_ids[obj['class']] for obj in objects]
+        boxes['confidence'] = [obj['confidence'] for obj in objects]
+        boxes['bbox'] = [obj['bbox'] for obj in objects]
+    return boxes
+
+
+class DetectionSeriesWriter:
+    """Append per-frame CCTV results of one video to a columnar sidecar
+    
+    The sidecar is a directory with frames.bin (FRAME_DTYPE), boxes.bin (BOX_DTYPE)
+    and meta.json holding the class names. Writes are appended to the existing
+    series. With truncate_from, rows from that frame number on are dropped first:
+    all of them for 0, when a video is processed from the start, or the ones past
+    the last checkpoint when a run resumes.
+    """
+    
+    def __init__(self, path, video_path=None, truncate_from=None):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        
+        meta_path = os.path.join(path, 'meta.json')
+        if os.path.exists(meta_path) and truncate_from != 0:
+            with open(meta_path, encoding='utf-8') as f:
+                self.meta = json.load(f)
+        else:
+            self.meta = {'video_path': video_path, 'class_names': []}
+            self._write_meta()
+        self._class_ids = {name: index for index, name in enumerate(self.meta['class_names'])}
+        
+        self._box_total = self._truncate(truncate_from)
+        self._frames = open(os.path.join(path, 'frames.bin'), 'ab')
+        self._boxes = open(os.path.join(path, 'boxes.bin'), 'ab')
+    
+    def write(self, record):
+        """Append one result record (as yielded by CCTVAnalyzer.iter_video)"""
+        detections = record['detections']
+        objects = detections.get('objects', [])
+        for obj in objects:
+            if obj['class'] not in self._class_ids:
+                if len(self._class_ids) > 255:
+                    raise ValueError(f"Too many classes for a uint8 class id in {self.path}")
+                self._class_ids[obj['class']] = len(self.meta['class_names'])
+                self.meta['class_names'].append(obj['class'])
+                self._write_meta()
+        
+        frame = np.zeros(1, dtype=FRAME_DTYPE)
+        frame['frame_number'] = record['frame_number']
+        frame['timestamp'] = record.get('timestamp') or 0.0
+        for name in ('people', 'vehicles', 'weapons', 'fire'):
+            frame[name] = min(detections.get(name, 0), 65535)
+        frame['threat_score'] = record['threat_score']
+        frame['anomaly_detected'] = record['anomaly_detected']
+        frame['first_box'] = self._box_total
+        frame['box_count'] = min(len(objects), 65535)
+        
+        self._boxes.write(pack_boxes(objects[:65535], self._class_ids).tobytes())
+        self._frames.write(frame.tobytes())
+        self._box_total += int(frame['box_count'][0])
+    
+    def flush(self):
+        """Hand the buffered rows to the OS, e.g. before the ledger records a checkpoint"""
+        self._boxes.flush()
+        self._frames.flush()
+    
+    def close(self):
+        self._frames.close()
+        self._boxes.close()
+    
+    def _truncate(self, from_frame):
+        """Cut the files back to whole rows recorded before from_frame and return the box count kept
+        
+        Rows of a video are in frame order. A run that stopped mid-write may also
+        have left a partial row or boxes without a frame row; those are dropped too.
+        """
+        frames_path = os.path.join(self.path, 'frames.bin')
+        frames = np.zeros(0, dtype=FRAME_DTYPE)
+        if os.path.exists(frames_path) and from_frame != 0:
+            count = os.path.getsize(frames_path) // FRAME_DTYPE.itemsize
+            frames = np.fromfile(frames_path, dtype=FRAME_DTYPE, count=count)
+        
+        kept = len(frames)
+        if from_frame is not None:
+            later = np.flatnonzero(frames['frame_number'] >= from_frame)
+            kept = int(later[0]) if len(later) else len(frames)
+        box_total = int(frames['first_box'][kept - 1] + frames['box_count'][kept - 1]) if kept else 0
+        
+        with open(frames_path, 'ab') as f:
+            f.truncate(kept * FRAME_DTYPE.itemsize)
+        with open(os.path.join(self.path, 'boxes.bin'), 'ab') as f:
+            f.truncate(box_total * BOX_DTYPE.itemsize)
+        return box_total
+    
+    def _write_meta(self):
+        # Written as soon as a class is added, so ids in boxes.bin can always be resolved
+        with open(os.path.join(self.path, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(self.meta, f)
+
+
+class DetectionSeries:
+    """Memory-mapped read access to a sidecar written by DetectionSeriesWriter
+    
+    frames is a structured array, so columns such as series.frames['people'] or
+    series.frames['threat_score'] can be analyzed without decoding any JSON.
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, 'meta.json'), encoding='utf-8') as f:
+            self.meta = json.load(f)
+        self.class_names = self.meta['class_names']
+        self.frames = self._map('frames.bin', FRAME_DTYPE)
+        self.boxes = self._map('boxes.bin', BOX_DTYPE)
+    
+    def __len__(self):
+        return len(self.frames)
+    
+    def frame_boxes(self, index):
+        """BOX_DTYPE rows of the index-th frame of the series"""
+        row = self.frames[index]
+        return self.boxes[row['first_box']:row['first_box'] + row['box_count']]
+    
+    def objects(self, index):
+        """Detections of the index-th frame in the analyzer's detections['objects'] format"""
+        return [
+            {'class': self.class_names[box['class_id']], 'confidence': float(box['confidence']),
+             'bbox': box['bbox'].astype(float).tolist()}
+            for box in self.frame_boxes(index)
+        ]
+    
+    def find_frame(self, frame_number):
+        """Index of the last row recorded for a source frame number, or None"""
+        matches = np.flatnonzero(self.frames['frame_number'] == frame_number)
+        return int(matches[-1]) if len(matches) else None
+    
+    def _map(self, filename, dtype):
+        file_path = os.path.join(self.path, filename)
+        if not os.path.exists(file_path) or os.path.getsize(file_path) < dtype.itemsize:
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(file_path, dtype=dtype, mode='r', shape=(os.path.getsize(file_path) // dtype.itemsize,))
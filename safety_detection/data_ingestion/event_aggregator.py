@@ -0,0 +1,78 @@
+from config.constants import CCTV_SETTINGS
+
+class EventAggregator:
+    """Merge consecutive anomalous frames of each video into events
+    
+    Results must be fed in frame order per video. An event opens at the first
+    anomalous frame and closes once more than max_gap normal sampled frames
+    follow it. Its representative frame is the one with the highest threat
+    score; only that frame's image is kept in memory while the event is open.
+    Callers may set the event's frame_image once that frame has been saved, and
+    keep the event's database row in its record.
+    """
+    
+    def __init__(self, max_gap=None):
+        self.max_gap = max_gap if max_gap is not None else CCTV_SETTINGS['EVENT_MAX_GAP']
+        self._open = {}
+    
+    def update(self, video_path, frame_number, timestamp, analysis_result, frame=None, context=None,
+               recorded_at=None):
+        """Add the next result of a video and return the event it closed, if any
+        
+        timestamp is the media time in seconds (None for live streams) and
+        recorded_at the wall-clock time of the frame, if known. context is stored
+        with a newly opened event (e.g. location and output directory).
+        """
+        event = self._open.get(video_path)
+        
+        if analysis_result['anomaly_detected']:
+            if event is None:
+                event = self._open[video_path] = {
+                    'video_path': video_path,
+                    'start_frame': frame_number,
+                    'start_time': timestamp,
+                    'started_at': recorded_at,
+                    'frame_count': 0,
+                    'density_total': 0.0,
+                    'peak_crowd_density': 0,
+                    'max_threat_score': -1.0,
+                    'context': context or {},
+                    'record': None,
+                }
+            
+            event['end_frame'] = frame_number
+            event['end_time'] = timestamp
+            event['ended_at'] = recorded_at
+            event['gap'] = 0
+            event['frame_count'] += 1
+            event['density_total'] += analysis_result['crowd_density']
+            event['peak_crowd_density'] = max(event['peak_crowd_density'], analysis_result['crowd_density'])
+            
+            if analysis_result['threat_score'] > event['max_threat_score']:
+                event['max_threat_score'] = analysis_result['threat_score']
+                event['threat_level'] = analysis_result['threat_level']
+                event['representative_frame'] = frame_number
+                event['frame'] = frame
+                event['frame_image'] = ''
+                event['detected_objects'] = analysis_result['detections']
+            return None
+        
+        if event is None:
+            return None
+        
+        event['gap'] += 1
+        if event['gap'] > self.max_gap:
+            return self._open.pop(video_path)
+        return None
+    
+    def open_event(self, video_path):
+        """The event still open for a video, or None"""
+        return self._open.get(video_path)
+    
+    def open_events(self):
+        """Every event that is still open"""
+        return list(self._open.values())
+    
+    def close(self, video_path):
+        """Close and return the open event of a video, or None"""
+        return self._open.pop(video_path, None)
@@ -0,0 +1,101 @@
+import cv2
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime
+from config.constants import CCTV_SETTINGS
+from ..utils.helpers import source_digest
+
+IMAGE_FORMATS = ['jpg', 'webp']
+
+def frame_filename(video_path, frame_number, image_format='jpg'):
+    """File name for a saved frame
+    
+    Frame numbers restart at 0 for every video or stream, so the name includes a
+    hash of the source; otherwise workers and cameras sharing an output directory
+    would overwrite each other's images.
+    """
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    return f"frame_{source_digest(video_path)}_{frame_number}_{timestamp}.{image_format}"
+
+
+def write_frame_image(frame_path, frame, quality=None):
+    """Encode and write a frame as it is; sampled frames already fit MAX_FRAME_SIZE"""
+    quality = quality if quality is not None else CCTV_SETTINGS['IMAGE_QUALITY']
+    if frame_path.lower().endswith('.webp'):
+        params = [cv2.IMWRITE_WEBP_QUALITY, quality]
+    else:
+        params = [cv2.IMWRITE_JPEG_QUALITY, quality]
+    
+    if not cv2.imwrite(frame_path, frame, params):
+        raise IOError(f"Could not write {frame_path}")
+
+
+class FrameImageWriter:
+    """Write frame images from a thread pool so encoding and disk I/O overlap with inference
+    
+    submit() returns the image path right away. At most max_queue images wait to be
+    written; beyond that submit() blocks, so a slow disk cannot exhaust memory.
+    Call wait() before relying on the files, e.g. before committing their rows.
+    """
+    
+    def __init__(self, output_dir, image_format=None, quality=None, workers=None, max_queue=None):
+        self.output_dir = output_dir
+        self.image_format = image_format or CCTV_SETTINGS['IMAGE_FORMAT']
+        if self.image_format not in IMAGE_FORMATS:
+            raise ValueError(f"Unknown image format: {self.image_format} (choose from {', '.join(IMAGE_FORMATS)})")
+        self.quality = quality
+        self.workers = workers or CCTV_SETTINGS['IMAGE_WRITER_THREADS']
+        self.written = 0
+        self.failed = 0
+        
+        self._slots = threading.BoundedSemaphore(max_queue or CCTV_SETTINGS['IMAGE_WRITER_QUEUE'])
+        self._futures = set()
+        self._lock = threading.Lock()
+        self._executor = None
+        
+        if output_dir and not os.path.exists(output_dir):
+            os.makedirs(output_dir)
+    
+    def submit(self, video_path, frame_number, frame):
+        """Queue a frame of video_path for writing and return its path relative to MEDIA_ROOT"""
+        filename = frame_filename(video_path, frame_number, self.image_format)
+        frame_path = os.path.join(self.output_dir, filename)
+        
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='frame-writer')
+        
+        self._slots.acquire()
+        future = self._executor.submit(write_frame_image, frame_path, frame, self.quality)
+        with self._lock:
+            self._futures.add(future)
+        future.add_done_callback(self._done)
+        return f"cctv_frames/{filename}"
+    
+    def wait(self):
+        """Block until every queued image has been written"""
+        with self._lock:
+            futures = list(self._futures)
+        wait(futures)
+    
+    def close(self):
+        """Write the remaining images and stop the threads"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+    
+    def __len__(self):
+        return len(self._futures)
+    
+    def _done(self, future):
+        error = future.exception()
+        with self._lock:
+            self._futures.discard(future)
+            if error:
+                self.failed += 1
+            else:
+                self.written += 1
+        self._slots.release()
+        
+        if error:
+            print(f"Error writing frame image: {error}")
@@ -0,0 +1,200 @@
+import json
+from datetime import timedelta
+from django.utils import timezone
+from ..models import CCTVAnalysis, CCTVEvent
+from .bulk_writer import BulkWriter
+from .detection_series import DetectionSeriesWriter, series_path
+
+# Sinks receive per-frame CCTV result records one at a time, e.g. from
+# CCTVAnalyzer.iter_video() or as CCTVProcessor(sinks=[...]). Each has write(record)
+# and close(). CCTVProcessor writes the database itself; CCTVAnalysisSink does the
+# same for records consumed outside the processor.
+
+def consume(records, sinks):
+    """Feed every record to every sink, closing the sinks afterwards; returns the record count"""
+    count = 0
+    try:
+        for record in records:
+            for sink in sinks:
+                sink.write(record)
+            count += 1
+    finally:
+        for sink in sinks:
+            sink.close()
+    return count
+
+
+def build_cctv_analysis(video_path, frame_image, location, analysis_result, frame_number=None, media_time=None,
+                        camera_started_at=None, recorded_at=None):
+    """Build an unsaved CCTVAnalysis; location is an optional (latitude, longitude) pair
+    
+    The row is timestamped with recorded_at if given, else with camera_started_at
+    plus media_time (seconds into the video) when both are known, else with now.
+    """
+    latitude, longitude = location if location else (None, None)
+    if recorded_at is None and camera_started_at is not None and media_time is not None:
+        recorded_at = camera_started_at + timedelta(seconds=media_time)
+    
+    return CCTVAnalysis(
+        video_path=video_path,
+        frame_image=frame_image,
+        timestamp=recorded_at or timezone.now(),
+        frame_number=frame_number,
+        media_time=media_time,
+        camera_started_at=camera_started_at,
+        latitude=latitude,
+        longitude=longitude,
+        crowd_density=analysis_result['crowd_density'],
+        anomaly_detected=analysis_result['anomaly_detected'],
+        detected_objects=analysis_result['detections'],
+        threat_level=analysis_result['threat_level']
+    )
+
+
+def build_cctv_event(event, frame_image, location):
+    """Build an unsaved CCTVEvent from an event tracked by EventAggregator"""
+    latitude, longitude = location if location else (None, None)
+    cctv_event = CCTVEvent(video_path=event['video_path'], latitude=latitude, longitude=longitude)
+    apply_event_totals(cctv_event, event, frame_image)
+    return cctv_event
+
+
+def apply_event_totals(cctv_event, event, frame_image=None):
+    """Copy an event's frame range and running totals onto its CCTVEvent; frame_image is kept if None"""
+    cctv_event.start_frame = event['start_frame']
+    cctv_event.end_frame = event['end_frame']
+    cctv_event.start_time = event['start_time']
+    cctv_event.end_time = event['end_time']
+    cctv_event.started_at = event['started_at']
+    cctv_event.ended_at = event['ended_at']
+    cctv_event.frame_count = event['frame_count']
+    cctv_event.peak_crowd_density = event['peak_crowd_density']
+    cctv_event.mean_crowd_density = event['density_total'] / event['frame_count']
+    cctv_event.max_threat_score = event['max_threat_score']
+    cctv_event.threat_level = event['threat_level']
+    cctv_event.representative_frame = event['representative_frame']
+    cctv_event.detected_objects = event['detected_objects']
+    if frame_image is not None:
+        cctv_event.frame_image = frame_image
+
+
+class CCTVAnalysisSink:
+    """Store anomalous records as CCTVAnalysis rows, built and bulk-inserted like CCTVProcessor's
+    
+    Frame images are written by image_writer (a FrameImageWriter) for records that
+    carry their frame (iter_video(include_frames=True)); rows are only committed
+    once their images are on disk.
+    """
+    
+    def __init__(self, location=None, image_writer=None, camera_started_at=None, writer=None):
+        self.location = location
+        self.image_writer = image_writer
+        self.camera_started_at = camera_started_at
+        self.writer = writer if writer is not None else BulkWriter(CCTVAnalysis)
+    
+    def write(self, record):
+        if not record['anomaly_detected']:
+            return
+        
+        frame_image = ''
+        if self.image_writer is not None and record.get('frame') is not None:
+            frame_image = self.image_writer.submit(record['video_path'], record['frame_number'], record['frame'])
+        
+        # The next add() flushes a full batch, whose images must be written first
+        if self.image_writer is not None and len(self.writer) + 1 >= self.writer.batch_size:
+            self.image_writer.wait()
+        self.writer.add(build_cctv_analysis(record['video_path'], frame_image, self.location, record,
+                                            record['frame_number'], record.get('timestamp'), self.camera_started_at))
+    
+    def close(self):
+        if self.image_writer is not None:
+            self.image_writer.close()
+        self.writer.flush()
+
+
+class JSONLinesSink:
+    """Append each record as one JSON line, without the decoded frame"""
+    
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'a', encoding='utf-8')
+    
+    def write(self, record):
+        record = {key: value for key, value in record.items() if key != 'frame'}
+        self._file.write(json.dumps(record, default=float) + '\n')
+    
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+
+class SummarySink:
+    """Running per-video totals that use constant memory however long the footage is"""
+    
+    def __init__(self):
+        self.videos = {}
+    
+    def write(self, record):
+        summary = self.videos.setdefault(record['video_path'], {
+            'frames': 0,
+            'anomalies': 0,
+            'threat_levels': {'LOW': 0, 'MEDIUM': 0, 'HIGH': 0},
+            'max_threat_score': 0.0,
+            'peak_crowd_density': 0,
+            'mean_crowd_density': 0.0,
+        })
+        summary['frames'] += 1
+        summary['anomalies'] += int(record['anomaly_detected'])
+        summary['threat_levels'][record['threat_level']] = summary['threat_levels'].get(record['threat_level'], 0) + 1
+        summary['max_threat_score'] = max(summary['max_threat_score'], record['threat_score'])
+        summary['peak_crowd_density'] = max(summary['peak_crowd_density'], record['crowd_density'])
+        summary['mean_crowd_density'] += (record['crowd_density'] - summary['mean_crowd_density']) / summary['frames']
+    
+    def close(self):
+        pass
+
+
+class DetectionSeriesSink:
+    """Write every frame's counts and boxes to a columnar sidecar per video (see detection_series)"""
+    
+    def __init__(self, directory):
+        self.directory = directory
+        self.writers = {}
+    
+    def path_for(self, video_path):
+        return series_path(self.directory, video_path)
+    
+    def start_video(self, video_path, start_frame=None):
+        """Open a video's sidecar before its first record
+        
+        Rows an earlier run recorded from start_frame on are dropped: all of them
+        when processing starts at frame 0, the ones past the last checkpoint when
+        it resumes. With None rows are appended, as for streams, whose rows are
+        told apart by their capture times.
+        """
+        self.close_video(video_path)
+        self.writers[video_path] = DetectionSeriesWriter(self.path_for(video_path), video_path, start_frame)
+    
+    def write(self, record):
+        writer = self.writers.get(record['video_path'])
+        if writer is None:
+            writer = DetectionSeriesWriter(self.path_for(record['video_path']), record['video_path'])
+            self.writers[record['video_path']] = writer
+        writer.write(record)
+    
+    def flush_video(self, video_path):
+        """Flush one video's sidecar, e.g. before its progress is checkpointed"""
+        writer = self.writers.get(video_path)
+        if writer:
+            writer.flush()
+    
+    def close_video(self, video_path):
+        """Close one video's sidecar, e.g. once the video is finished"""
+        writer = self.writers.pop(video_path, None)
+        if writer:
+            writer.close()
+    
+    def close(self):
+        for writer in self.writers.values():
+            writer.close()
+        self.writers = {}
@@ -1,118 +1,252 @@
 import pandas as pd
+import gzip
 import json
 from datetime import datetime
 from django.utils import timezone
-from ...models import SocialMediaPost
+from ..models import SocialMediaPost
 from ..ai_analyzer import SocialMediaAnalyzer
+from config.constants import INGESTION_SETTINGS
+from .bulk_writer import BulkWriter
+
+# Gzip files are detected by content rather than extension
+GZIP_MAGIC = b'\x1f\x8b'
+
+# Characters read at a time when decoding a top-level JSON array
+JSON_READ_SIZE = 1024 * 1024
+
+# An array element still undecodable after this many characters is treated as malformed
+JSON_MAX_ELEMENT_SIZE = 16 * JSON_READ_SIZE
+
+# Input columns that may hold each post field, in order of preference.
+# Nested JSON objects are flattened into dotted columns, e.g. a tweet's user.screen_name
+FIELD_COLUMNS = {
+    'text': ['text', 'tweet', 'content', 'message', 'post'],
+    'author': ['user', 'author', 'username', 'screen_name', 'user.screen_name', 'user.username', 'user.name',
+               'author.username', 'author.name'],
+    'timestamp': ['timestamp', 'created_at', 'date', 'time'],
+    'latitude': ['lat', 'latitude'],
+    'longitude': ['lng', 'longitude', 'lon'],
+}
 
 class SocialMediaIngestor:
-    def __init__(self):
+    def __init__(self, chunk_size=None, batch_size=None, progress_callback=None):
         self.analyzer = SocialMediaAnalyzer()
+        # Posts are analyzed chunk_size at a time; batch_size is the model batch size
+        self.chunk_size = chunk_size or INGESTION_SETTINGS['ANALYSIS_CHUNK_SIZE']
+        self.batch_size = batch_size
+        # Called with the running total of stored posts after every database batch
+        self.progress_callback = progress_callback or self._print_progress
     
     def ingest_csv(self, csv_path, source='twitter'):
-        """Ingest social media data from CSV file"""
+        """Ingest social media data from CSV file
+        
+        The file is streamed chunk_size rows at a time, so memory stays bounded
+        however large the export is. Posts are inserted in bulk, DB_SETTINGS['BATCH_SIZE']
+        rows per transaction.
+        """
+        writer = BulkWriter(SocialMediaPost, progress_callback=self.progress_callback)
         try:
-            df = pd.read_csv(csv_path)
-            ingested_count = 0
-            
-            for _, row in df.iterrows():
-                try:
-                    # Extract text from various possible column names
-                    text = self._extract_text(row)
-                    if not text or len(text.strip()) < 10:
-                        continue
-                    
-                    # Analyze the text
-                    sentiment, sentiment_score = self.analyzer.analyze_sentiment(text)
-                    threat_level, confidence = self.analyzer.detect_threat(text)
-                    incident_type = self.analyzer.classify_incident_type(text)
-                    
-                    # Create social media post
-                    post = SocialMediaPost(
-                        text=text[:1000],
-                        source=source,
-                        author=self._extract_author(row),
-                        timestamp=self._extract_timestamp(row),
-                        threat_level=threat_level,
-                        incident_type=incident_type,
-                        sentiment_score=sentiment_score,
-                        confidence=confidence,
-                        latitude=self._extract_latitude(row),
-                        longitude=self._extract_longitude(row)
-                    )
-                    
-                    post.save()
-                    ingested_count += 1
-                    
-                    if ingested_count % 100 == 0:
-                        print(f"Ingested {ingested_count} posts...")
-                        
-                except Exception as e:
-                    print(f"Error processing row: {e}")
-                    continue
+            columns = None
             
-            print(f"Successfully ingested {ingested_count} social media posts")
-            return ingested_count
+            # Read everything as text; each field is converted column-wise below
+            for chunk in pd.read_csv(csv_path, chunksize=self.chunk_size, dtype=str):
+                if columns is None:
+                    columns = self._resolve_columns(chunk.columns)
+                    if not columns['text']:
+                        print(f"No text column found in {csv_path}")
+                        return 0
+                self._ingest_rows(self._normalize(chunk, columns), source, writer)
             
         except Exception as e:
             print(f"Error reading CSV file: {e}")
-            return 0
+        finally:
+            # Keep whatever was read before an error
+            writer.flush()
+        
+        print(f"Successfully ingested {writer.written} social media posts")
+        return writer.written
     
-    def _extract_text(self, row):
-        """Extract text from row with multiple possible column names"""
-        text_columns = ['text', 'tweet', 'content', 'message', 'post']
+    def ingest_json(self, json_path, source='twitter'):
+        """Ingest social media data from a JSON array or JSON Lines file, optionally gzipped
         
-        for col in text_columns:
-            if col in row and pd.notna(row[col]):
-                return str(row[col])
+        Records are parsed one at a time and analyzed chunk_size at a time, so memory
+        stays constant however large the file is. Malformed JSON lines are skipped; a
+        malformed array element ends the array, keeping the records before it.
+        """
+        writer = BulkWriter(SocialMediaPost, progress_callback=self.progress_callback)
+        try:
+            with self._open_text(json_path) as f:
+                records = []
+                for record in self._iter_json_records(f):
+                    records.append(record)
+                    if len(records) >= self.chunk_size:
+                        self._ingest_records(records, source, writer)
+                        records = []
+                if records:
+                    self._ingest_records(records, source, writer)
+            
+        except Exception as e:
+            print(f"Error reading JSON file: {e}")
+        finally:
+            # Keep whatever was read before an error
+            writer.flush()
         
-        return ""
+        print(f"Successfully ingested {writer.written} social media posts")
+        return writer.written
     
-    def _extract_author(self, row):
-        """Extract author information"""
-        author_columns = ['user', 'author', 'username', 'screen_name']
-        
-        for col in author_columns:
-            if col in row and pd.notna(row[col]):
-                return str(row[col])
+    def _ingest_records(self, records, source, writer):
+        """Normalize a chunk of JSON records like a CSV chunk and queue them on writer"""
+        # Nested objects become dotted columns rather than their repr
+        chunk = pd.json_normalize(records).astype(object)
+        # Records need not share keys, so columns are resolved per chunk
+        columns = self._resolve_columns(chunk.columns)
+        if not columns['text']:
+            return
+        # Match the CSV path, where every value is read as text; lists have no text form
+        chunk = chunk.mask(chunk.map(lambda value: isinstance(value, list)))
+        chunk = chunk.where(chunk.isna(), chunk.astype(str))
+        self._ingest_rows(self._normalize(chunk, columns), source, writer)
+    
+    def _open_text(self, path):
+        """Open a file for reading as text, decompressing it if it is gzipped"""
+        with open(path, 'rb') as f:
+            compressed = f.read(2) == GZIP_MAGIC
+        if compressed:
+            return gzip.open(path, 'rt', encoding='utf-8')
+        return open(path, 'r', encoding='utf-8')
+    
+    def _iter_json_records(self, f):
+        """Yield the objects of a top-level JSON array, or of a JSON Lines file"""
+        first = f.read(1)
+        while first and first.isspace():
+            first = f.read(1)
+        f.seek(0)
         
-        return "unknown"
+        records = self._iter_json_array(f) if first == '[' else self._iter_json_lines(f)
+        for record in records:
+            if isinstance(record, dict):
+                yield record
+    
+    def _iter_json_lines(self, f):
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError as e:
+                print(f"Skipping line {line_number}: {e}")
     
-    def _extract_timestamp(self, row):
-        """Extract timestamp from row"""
-        timestamp_columns = ['timestamp', 'created_at', 'date', 'time']
+    def _iter_json_array(self, f):
+        """Decode the elements of a top-level JSON array incrementally, reading JSON_READ_SIZE characters at a time"""
+        decoder = json.JSONDecoder()
+        buffer = f.read(JSON_READ_SIZE)
+        pos = buffer.index('[') + 1
+        count = 0
         
-        for col in timestamp_columns:
-            if col in row and pd.notna(row[col]):
-                try:
-                    return pd.to_datetime(row[col])
-                except:
-                    pass
+        while True:
+            # Skip whitespace and separators, reading more once the buffer runs out
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+                pos += 1
+            if pos == len(buffer):
+                buffer, pos = f.read(JSON_READ_SIZE), 0
+                if not buffer:
+                    return
+                continue
+            if buffer[pos] == ']':
+                return
+            
+            try:
+                value, pos = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError as e:
+                # Most likely an element cut off at the end of the buffer, unless it has
+                # grown past JSON_MAX_ELEMENT_SIZE or the file has ended
+                more = f.read(JSON_READ_SIZE) if len(buffer) - pos < JSON_MAX_ELEMENT_SIZE else ''
+                if not more:
+                    print(f"Stopping at malformed JSON array element {count + 1}: {e}")
+                    return
+                buffer, pos = buffer[pos:] + more, 0
+                continue
+            count += 1
+            yield value
+    
+    def _ingest_rows(self, posts, source, writer):
+        """Analyze a normalized chunk of posts in one batch and queue them on writer"""
+        if posts.empty:
+            return
+        analyses = self.analyzer.analyze_batch(posts['text'].tolist(), self.batch_size)
         
-        return timezone.now()
+        for post_row, analysis in zip(posts.itertuples(index=False), analyses):
+            try:
+                # Create social media post
+                writer.add(SocialMediaPost(
+                    text=post_row.text[:1000],
+                    source=source,
+                    author=post_row.author,
+                    timestamp=post_row.timestamp,
+                    threat_level=analysis['threat_level'],
+                    incident_type=analysis['incident_type'],
+                    sentiment_score=analysis['sentiment_score'],
+                    confidence=analysis['confidence'],
+                    latitude=post_row.latitude,
+                    longitude=post_row.longitude
+                ))
+            except Exception as e:
+                print(f"Error processing row: {e}")
+                continue
     
-    def _extract_latitude(self, row):
-        """Extract latitude from row if available"""
-        try:
-            if 'lat' in row and pd.notna(row['lat']):
-                return float(row['lat'])
-            elif 'latitude' in row and pd.notna(row['latitude']):
-                return float(row['latitude'])
-        except:
-            pass
+    def _print_progress(self, ingested_count):
+        print(f"Ingested {ingested_count} posts...")
+    
+    def _resolve_columns(self, available):
+        """Map each post field to the input columns that may hold it, in order of preference"""
+        return {field: [col for col in candidates if col in available]
+                for field, candidates in FIELD_COLUMNS.items()}
+    
+    def _normalize(self, chunk, columns):
+        """Turn a chunk of raw rows into text, author, timestamp, latitude and longitude columns
+        
+        Rows whose text is missing or shorter than 10 characters are dropped. For each
+        field the first column with a usable value wins, as with per-row lookups.
+        """
+        text = self._first_valid(chunk, columns['text'])
+        keep = text.notna() & (text.astype(str).str.strip().str.len() >= 10)
+        chunk = chunk[keep]
+        
+        author = self._first_valid(chunk, columns['author'])
+        timestamp = self._first_valid(chunk, columns['timestamp'], self._parse_timestamps)
+        latitude = self._first_valid(chunk, columns['latitude'], self._parse_coordinates)
+        longitude = self._first_valid(chunk, columns['longitude'], self._parse_coordinates)
         
-        return None
+        return pd.DataFrame({
+            'text': text[keep].astype(str),
+            'author': author.fillna('unknown').astype(str),
+            'timestamp': timestamp.astype(object).where(timestamp.notna(), timezone.now()),
+            # None rather than NaN so empty coordinates are stored as NULL
+            'latitude': latitude.astype(object).where(latitude.notna(), None),
+            'longitude': longitude.astype(object).where(longitude.notna(), None),
+        }, index=chunk.index)
     
-    def _extract_longitude(self, row):
-        """Extract longitude from row if available"""
-        try:
-            if 'lng' in row and pd.notna(row['lng']):
-                return float(row['lng'])
-            elif 'longitude' in row and pd.notna(row['longitude']):
-                return float(row['longitude'])
-            elif 'lon' in row and pd.notna(row['lon']):
-                return float(row['lon'])
-        except:
-            pass
+    def _first_valid(self, chunk, columns, parse=None):
+        """Coalesce the given columns (parsed with parse, if given) into one series"""
+        values = None
+        for col in columns:
+            column = parse(chunk[col]) if parse else chunk[col]
+            values = column if values is None else values.combine_first(column)
+        if values is None:
+            return pd.Series(None, index=chunk.index, dtype=object)
+        return values
+    
+    def _parse_timestamps(self, values):
+        """Parse a column of timestamps as UTC; unparseable values become NaT"""
+        parsed = pd.to_datetime(values, errors='coerce', utc=True)
         
-        return None
\ No newline at end of file
+        # The inferred format can miss rows written differently; parse those one by one
+        retry = parsed.isna() & values.notna()
+        if retry.any():
+            parsed[retry] = pd.to_datetime(values[retry], errors='coerce', utc=True, format='mixed')
+        return parsed
+    
+    def _parse_coordinates(self, values):
+        """Convert a column to floats; anything non-numeric becomes NaN"""
+        return pd.to_numeric(values, errors='coerce')
@@ -0,0 +1,74 @@
+import hashlib
+import os
+from ..models import ProcessedVideo
+
+# Bytes read from the start and end of a file for its content fingerprint
+FINGERPRINT_CHUNK = 1024 * 1024
+
+class VideoLedger:
+    """Ledger of processed video files backed by the ProcessedVideo table
+    
+    Files are identified by absolute path, size and mtime, with a hash of their
+    first and last megabyte as a fallback when only the mtime changed (e.g. after a copy).
+    """
+    
+    def start(self, video_path):
+        """Return the first frame still to process, or None if the file is already done"""
+        video_path = os.path.abspath(video_path)
+        size, mtime = self._stat(video_path)
+        entry = ProcessedVideo.objects.filter(path=video_path).first()
+        
+        if entry and not self._matches(entry, video_path, size, mtime):
+            print(f"{video_path} changed since it was last processed, starting over")
+            entry.delete()
+            entry = None
+        
+        if entry is None:
+            ProcessedVideo.objects.create(
+                path=video_path,
+                size=size,
+                mtime=mtime,
+                content_hash=self.fingerprint(video_path)
+            )
+            return 0
+        
+        if entry.completed:
+            return None
+        return entry.last_frame + 1
+    
+    def checkpoint(self, video_path, last_frame):
+        """Record that every frame up to last_frame has been processed and stored"""
+        video_path = os.path.abspath(video_path)
+        ProcessedVideo.objects.filter(path=video_path).update(last_frame=last_frame)
+    
+    def complete(self, video_path):
+        """Mark a file as fully processed"""
+        video_path = os.path.abspath(video_path)
+        ProcessedVideo.objects.filter(path=video_path).update(completed=True)
+    
+    def fingerprint(self, video_path):
+        """SHA-1 of the file size plus its first and last megabyte"""
+        size = os.path.getsize(video_path)
+        digest = hashlib.sha1(str(size).encode())
+        with open(video_path, 'rb') as f:
+            digest.update(f.read(FINGERPRINT_CHUNK))
+            f.seek(max(0, size - FINGERPRINT_CHUNK))
+            digest.update(f.read(FINGERPRINT_CHUNK))
+        return digest.hexdigest()
+    
+    def _matches(self, entry, video_path, size, mtime):
+        """Check whether a ledger entry still describes the file on disk"""
+        if entry.size != size:
+            return False
+        if entry.mtime == mtime:
+            return True
+        
+        # Same size but touched: compare content before reprocessing
+        if entry.content_hash and entry.content_hash == self.fingerprint(video_path):
+            ProcessedVideo.objects.filter(pk=entry.pk).update(mtime=mtime)
+            return True
+        return False
+    
+    def _stat(self, video_path):
+        stat = os.stat(video_path)
+        return stat.st_size, stat.st_mtime
\ No newline at end of file
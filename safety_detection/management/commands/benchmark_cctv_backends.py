@@ -0,0 +1,125 @@
+from django.core.management.base import BaseCommand
+from safety_detection.ai_analyzer import CCTVAnalyzer
+from safety_detection.ai_analyzer.detector_backends import BACKENDS, PYTORCH
+from safety_detection.utils.frame_sampler import FrameSampler
+import os
+import time
+import cv2
+import numpy as np
+
+class Command(BaseCommand):
+    help = 'Compare latency and accuracy of CCTV detector backends against the PyTorch model'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('source', type=str, help='Video file or directory of images to benchmark on')
+        parser.add_argument('--model-path', type=str, default='yolov8n.pt', help='PyTorch weights to export from')
+        parser.add_argument('--backends', nargs='+', choices=BACKENDS, default=BACKENDS, help='Backends to compare')
+        parser.add_argument('--frames', type=int, default=64, help='Number of frames to benchmark')
+        parser.add_argument('--frame-interval', type=int, default=30, help='Frame sampling interval for videos')
+        parser.add_argument('--batch-size', type=int, default=8, help='Frames per inference call')
+        parser.add_argument('--iou', type=float, default=0.5, help='IoU for matching boxes against the baseline')
+    
+    def handle(self, *args, **options):
+        frames = self._load_frames(options['source'], options['frames'], options['frame_interval'])
+        if not frames:
+            self.stdout.write(self.style.ERROR(f"No frames could be read from {options['source']}"))
+            return
+        
+        self.stdout.write(f"Benchmarking {len(frames)} frames, batch size {options['batch_size']}")
+        
+        # The PyTorch model is always run first as the accuracy reference
+        backends = [PYTORCH] + [backend for backend in options['backends'] if backend != PYTORCH]
+        baseline = None
+        
+        self.stdout.write(f"{'backend':<10} {'ms/frame':>9} {'speedup':>8} {'level agree':>12} "
+                          f"{'score diff':>11} {'people diff':>12} {'box F1':>7}")
+        
+        for backend in backends:
+            analyzer = CCTVAnalyzer(options['model_path'], batch_size=options['batch_size'], backend=backend)
+            
+            # Warm up (and export on first use) outside the timed run
+            analyzer.analyze_frames(frames[:options['batch_size']])
+            
+            started = time.perf_counter()
+            results = analyzer.analyze_frames(frames)
+            ms_per_frame = (time.perf_counter() - started) * 1000 / len(frames)
+            
+            if not any(results):
+                self.stdout.write(self.style.ERROR(f"{backend:<10} failed, see errors above"))
+                continue
+            
+            if baseline is None:
+                baseline = (results, ms_per_frame)
+            
+            accuracy = self._compare(baseline[0], results, options['iou'])
+            self.stdout.write(
+                f"{backend:<10} {ms_per_frame:>9.1f} {baseline[1] / ms_per_frame:>7.2f}x "
+                f"{accuracy['level_agreement']:>11.1%} {accuracy['score_diff']:>11.3f} "
+                f"{accuracy['people_diff']:>12.2f} {accuracy['box_f1']:>7.3f}"
+            )
+    
+    def _load_frames(self, source, limit, frame_interval):
+        """Read up to limit frames from a video file or an image directory"""
+        frames = []
+        if os.path.isdir(source):
+            for filename in sorted(os.listdir(source)):
+                frame = cv2.imread(os.path.join(source, filename))
+                if frame is not None:
+                    frames.append(frame)
+                if len(frames) >= limit:
+                    break
+        else:
+            try:
+                for frame_number, timestamp, frame in FrameSampler(source, frame_interval):
+                    frames.append(frame)
+                    if len(frames) >= limit:
+                        break
+            except IOError as e:
+                self.stdout.write(self.style.ERROR(str(e)))
+        return frames
+    
+    def _compare(self, reference, results, iou_threshold):
+        """Agreement of a backend's results with the reference results"""
+        pairs = [(ref, res) for ref, res in zip(reference, results) if ref and res]
+        if not pairs:
+            return {'level_agreement': 0.0, 'score_diff': 0.0, 'people_diff': 0.0, 'box_f1': 0.0}
+        
+        matched = reference_boxes = result_boxes = 0
+        for ref, res in pairs:
+            matched += self._match_boxes(ref['detections']['objects'], res['detections']['objects'], iou_threshold)
+            reference_boxes += len(ref['detections']['objects'])
+            result_boxes += len(res['detections']['objects'])
+        
+        precision = matched / result_boxes if result_boxes else 1.0
+        recall = matched / reference_boxes if reference_boxes else 1.0
+        
+        return {
+            'level_agreement': np.mean([ref['threat_level'] == res['threat_level'] for ref, res in pairs]),
+            'score_diff': np.mean([abs(ref['threat_score'] - res['threat_score']) for ref, res in pairs]),
+            'people_diff': np.mean([abs(ref['crowd_density'] - res['crowd_density']) for ref, res in pairs]),
+            'box_f1': 2 * precision * recall / (precision + recall) if precision + recall else 0.0,
+        }
+    
+    def _match_boxes(self, reference, objects, iou_threshold):
+        """Greedily match same-class boxes by IoU and return the number of matches"""
+        unmatched = list(reference)
+        matched = 0
+        for obj in sorted(objects, key=lambda o: -o['confidence']):
+            best, best_iou = None, iou_threshold
+            for candidate in unmatched:
+                if candidate['class'] != obj['class']:
+                    continue
+                overlap = self._iou(candidate['bbox'], obj['bbox'])
+                if overlap >= best_iou:
+                    best, best_iou = candidate, overlap
+            if best is not None:
+                unmatched.remove(best)
+                matched += 1
+        return matched
+    
+    def _iou(self, a, b):
+        x1, y1 = max(a[0], b[0]), max(a[1], b[1])
+        x2, y2 = min(a[2], b[2]), min(a[3], b[3])
+        intersection = max(0.0, x2 - x1) * max(0.0, y2 - y1)
+        union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - intersection
+        return intersection / union if union > 0 else 0.0
\ No newline at end of file
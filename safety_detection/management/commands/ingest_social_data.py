@@ -3,11 +3,13 @@ from safety_detection.data_ingestion import SocialMediaIngestor
 import os
 
 class Command(BaseCommand):
-    help = 'Ingest social media data from CSV or JSON files'
+    help = 'Ingest social media data from CSV, JSON or JSON Lines files (optionally gzipped)'
 
     def add_arguments(self, parser):
         parser.add_argument('file_path', type=str, help='Path to the data file')
         parser.add_argument('--source', type=str, default='twitter', help='Data source (twitter, facebook, etc.)')
+        parser.add_argument('--chunk-size', type=int, default=None, help='Posts analyzed together per chunk')
+        parser.add_argument('--batch-size', type=int, default=None, help='Texts per model forward pass')
 
     def handle(self, *args, **options):
         file_path = options['file_path']
@@ -17,14 +19,21 @@ class Command(BaseCommand):
             self.stdout.write(self.style.ERROR(f"File not found: {file_path}"))
             return
         
-        ingestor = SocialMediaIngestor()
+        ingestor = SocialMediaIngestor(
+            chunk_size=options['chunk_size'],
+            batch_size=options['batch_size'],
+            progress_callback=lambda count: self.stdout.write(f"Ingested {count} posts...")
+        )
         
-        if file_path.endswith('.csv'):
+        # Compressed files are named like data.csv.gz or data.jsonl.gz
+        name = file_path[:-3] if file_path.endswith('.gz') else file_path
+        
+        if name.endswith('.csv'):
             count = ingestor.ingest_csv(file_path, source)
-        elif file_path.endswith('.json'):
+        elif name.endswith(('.json', '.jsonl')):
             count = ingestor.ingest_json(file_path, source)
         else:
-            self.stdout.write(self.style.ERROR("Unsupported file format. Use CSV or JSON."))
+            self.stdout.write(self.style.ERROR("Unsupported file format. Use CSV, JSON or JSON Lines, optionally gzipped."))
             return
         
         if count > 0:
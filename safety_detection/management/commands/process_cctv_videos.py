@@ -1,29 +1,204 @@
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from safety_detection.data_ingestion import CCTVProcessor
+from safety_detection.data_ingestion.cctv_processor import list_video_files, process_videos_parallel
+from safety_detection.data_ingestion.cctv_stream import DROP_NEWEST, DROP_OLDEST
+from safety_detection.data_ingestion.frame_writer import IMAGE_FORMATS
+from safety_detection.data_ingestion.result_sinks import JSONLinesSink, SummarySink
+from safety_detection.ai_analyzer.detector_backends import BACKENDS
+from django.utils import timezone
+from datetime import datetime
 import os
 
 class Command(BaseCommand):
     help = 'Process CCTV videos for anomaly detection'
 
     def add_arguments(self, parser):
-        parser.add_argument('path', type=str, help='Path to video file or directory')
+        parser.add_argument('path', type=str, nargs='+',
+                            help='Path to video file or directory, or stream URLs/files with --stream')
         parser.add_argument('--output-dir', type=str, help='Output directory for frames')
+        parser.add_argument('--image-format', choices=IMAGE_FORMATS, default=None,
+                            help='Format of saved frames (default: CCTV_SETTINGS IMAGE_FORMAT)')
+        parser.add_argument('--image-quality', type=int, default=None, help='Encoder quality (0-100) of saved frames')
         parser.add_argument('--frame-interval', type=int, default=30, help='Frame processing interval')
+        parser.add_argument('--sample-seconds', type=float, default=None,
+                            help='Sample one frame every N seconds of video instead of using --frame-interval')
+        parser.add_argument('--adaptive-interval', type=int, nargs=2, metavar=('MIN', 'MAX'), default=None,
+                            help='Sample every MAX frames while the threat score is low, down to every MIN frames '
+                                 'as it rises (overrides --frame-interval and --sample-seconds). Each sample is '
+                                 'analyzed before the next is taken, so frames are sent to YOLO one at a time, '
+                                 'without --batch-size batching, until sampling reaches every MIN frames')
+        parser.add_argument('--batch-size', type=int, default=None, help='Sampled frames per YOLO inference call')
+        parser.add_argument('--backend', choices=BACKENDS, default=None,
+                            help='Detector inference backend (default: YOLO_CONFIG BACKEND)')
+        parser.add_argument('--motion-gate', action='store_true',
+                            help='Skip inference on frames without significant change from the last analyzed frame')
+        parser.add_argument('--motion-threshold', type=int, default=None,
+                            help='Grayscale difference (0-255) that counts as a changed pixel')
+        parser.add_argument('--motion-min-area', type=float, default=None,
+                            help='Fraction of changed pixels needed to run the detector (lower = more sensitive)')
+        parser.add_argument('--dedup', action='store_true',
+                            help='Store only anomalous frames whose scene or threat level changed')
+        parser.add_argument('--dedup-distance', type=int, default=None,
+                            help='Max perceptual-hash bit difference (of 64) treated as the same scene')
+        parser.add_argument('--events', action='store_true',
+                            help='Merge consecutive anomalous frames into one CCTVEvent per incident')
+        parser.add_argument('--no-frame-details', action='store_true',
+                            help='With --events, store only the events and no per-frame CCTVAnalysis rows')
+        parser.add_argument('--detections-dir', type=str, default=None,
+                            help='Write per-frame counts and boxes to compact sidecar files in this directory; '
+                                 'CCTVAnalysis rows then keep only the counts')
+        parser.add_argument('--camera-start', type=datetime.fromisoformat, default=None,
+                            help='Wall-clock time of the first frame (ISO 8601) for single video files, '
+                                 'used to timestamp results in real time')
+        parser.add_argument('--workers', type=int, default=1, help='Number of worker processes for directory processing')
+        parser.add_argument('--reprocess', action='store_true',
+                            help='Ignore the processed-file ledger and process every file from the start')
+        parser.add_argument('--stream', action='store_true',
+                            help='Run continuously on RTSP/HTTP sources (local files are replayed in real time)')
+        parser.add_argument('--queue-size', type=int, default=8, help='Frames buffered per stream before dropping')
+        parser.add_argument('--drop-policy', choices=[DROP_OLDEST, DROP_NEWEST], default=DROP_OLDEST,
+                            help='Which frame to drop when a stream queue is full')
+        parser.add_argument('--duration', type=float, default=None, help='Stop stream processing after N seconds')
+        parser.add_argument('--stats-interval', type=float, default=30, help='Seconds between stream lag reports')
+        parser.add_argument('--fps-budget', type=float, default=None,
+                            help='Analyzed frames per second allowed per camera (default: unlimited)')
+        parser.add_argument('--camera-budget', action='append', default=[], metavar='SOURCE=FPS',
+                            help='Frame budget for one stream, overriding --fps-budget (repeatable)')
+        parser.add_argument('--camera-priority', action='append', default=[], metavar='SOURCE=WEIGHT',
+                            help='Share of inference for one stream relative to the default of 1 (repeatable)')
+        parser.add_argument('--inference-workers', type=int, default=1,
+                            help='Stream batches analyzed concurrently, each with its own model copy')
+        parser.add_argument('--jsonl', type=str, default=None,
+                            help='Also append every per-frame result to this JSON Lines file (not with --workers)')
 
     def handle(self, *args, **options):
-        path = options['path']
+        paths = options['path']
         output_dir = options['output_dir']
         frame_interval = options['frame_interval']
+        seconds_interval = options['sample_seconds']
+        batch_size = options['batch_size']
+        workers = options['workers']
+        processor_options = {
+            'use_motion_gate': options['motion_gate'],
+            'motion_threshold': options['motion_threshold'],
+            'motion_min_area': options['motion_min_area'],
+            'use_ledger': not options['reprocess'] and not options['stream'],
+            'backend': options['backend'],
+            'use_dedup': options['dedup'],
+            'dedup_distance': options['dedup_distance'],
+            'image_format': options['image_format'],
+            'image_quality': options['image_quality'],
+            'aggregate_events': options['events'],
+            'frame_details': not options['no_frame_details'],
+            'detections_dir': options['detections_dir'],
+        }
         
-        if not os.path.exists(path):
-            self.stdout.write(self.style.ERROR(f"Path not found: {path}"))
+        summary = SummarySink()
+        sinks = [summary]
+        if options['jsonl']:
+            sinks.append(JSONLinesSink(options['jsonl']))
+        try:
+            self._process_paths(paths, output_dir, frame_interval, seconds_interval, batch_size, workers,
+                                processor_options, sinks, options)
+        finally:
+            for sink in sinks:
+                sink.close()
+        self._report_summary(summary)
+    
+    def _process_paths(self, paths, output_dir, frame_interval, seconds_interval, batch_size, workers,
+                       processor_options, sinks, options):
+        if options['stream']:
+            processor = CCTVProcessor(batch_size=batch_size, sinks=sinks, **processor_options)
+            count = processor.process_streams(
+                paths,
+                output_dir=output_dir,
+                sample_seconds=seconds_interval or 1.0,
+                queue_size=options['queue_size'],
+                drop_policy=options['drop_policy'],
+                stats_interval=options['stats_interval'],
+                duration=options['duration'],
+                fps_budget=options['fps_budget'],
+                camera_budgets=self._parse_source_values(options['camera_budget']),
+                camera_priorities=self._parse_source_values(options['camera_priority']),
+                inference_workers=options['inference_workers']
+            )
+            self.stdout.write(self.style.SUCCESS(f"Processed {count} anomalous frames from {len(paths)} streams"))
             return
         
-        processor = CCTVProcessor()
+        processor = None
+        for path in paths:
+            if not os.path.exists(path):
+                self.stdout.write(self.style.ERROR(f"Path not found: {path}"))
+                continue
+            
+            if os.path.isdir(path) and workers > 1:
+                if options['jsonl']:
+                    self.stdout.write(self.style.WARNING("--jsonl is not written by worker processes"))
+                self._process_parallel(path, output_dir, frame_interval, seconds_interval, batch_size, workers,
+                                       processor_options, options['adaptive_interval'])
+                continue
+            
+            if processor is None:
+                processor = CCTVProcessor(batch_size=batch_size, sinks=sinks, **processor_options)
+            
+            if os.path.isfile(path):
+                count = processor.process_video_file(path, output_dir=output_dir, frame_interval=frame_interval,
+                                                     seconds_interval=seconds_interval,
+                                                     adaptive_interval=options['adaptive_interval'],
+                                                     camera_started_at=self._camera_start(options['camera_start']))
+                self.stdout.write(self.style.SUCCESS(f"Processed {count} anomalous frames from {path}"))
+            elif os.path.isdir(path):
+                count = processor.process_directory(path, output_dir=output_dir, frame_interval=frame_interval,
+                                                    seconds_interval=seconds_interval,
+                                                    adaptive_interval=options['adaptive_interval'])
+                self.stdout.write(self.style.SUCCESS(f"Processed {count} total anomalous frames from directory"))
+    
+    def _report_summary(self, summary):
+        """Print the per-video totals collected by the SummarySink (not filled by worker processes)"""
+        for video_path, totals in summary.videos.items():
+            levels = totals['threat_levels']
+            self.stdout.write(
+                f"{video_path}: {totals['frames']} frames analyzed, {totals['anomalies']} anomalous "
+                f"(HIGH {levels['HIGH']}, MEDIUM {levels['MEDIUM']}), max threat {totals['max_threat_score']:.2f}, "
+                f"peak crowd {totals['peak_crowd_density']}, mean crowd {totals['mean_crowd_density']:.1f}"
+            )
+    
+    def _camera_start(self, camera_start):
+        """Make a --camera-start value timezone-aware in the current time zone"""
+        if camera_start and timezone.is_naive(camera_start):
+            return timezone.make_aware(camera_start)
+        return camera_start
+    
+    def _parse_source_values(self, pairs):
+        """Turn SOURCE=VALUE arguments into a dict; the value follows the last '='"""
+        values = {}
+        for pair in pairs:
+            source, _, value = pair.rpartition('=')
+            if not source:
+                raise CommandError(f"Expected SOURCE=VALUE, got: {pair}")
+            values[source] = float(value)
+        return values
+    
+    def _process_parallel(self, directory_path, output_dir, frame_interval, seconds_interval, batch_size, workers,
+                          processor_options, adaptive_interval=None):
+        """Process a directory of videos with a pool of worker processes"""
+        video_paths = list_video_files(directory_path)
+        self.stdout.write(f"Processing {len(video_paths)} videos with {workers} workers...")
         
-        if os.path.isfile(path):
-            count = processor.process_video_file(path, output_dir=output_dir, frame_interval=frame_interval)
-            self.stdout.write(self.style.SUCCESS(f"Processed {count} anomalous frames from {path}"))
-        elif os.path.isdir(path):
-            count = processor.process_directory(path, output_dir=output_dir)
-            self.stdout.write(self.style.SUCCESS(f"Processed {count} total anomalous frames from directory"))
\ No newline at end of file
+        def report_progress(done, total, video_path, count):
+            self.stdout.write(f"[{done}/{total}] {os.path.basename(video_path)}: {count} anomalous frames")
+        
+        results = process_videos_parallel(
+            video_paths,
+            workers,
+            batch_size=batch_size,
+            output_dir=output_dir,
+            frame_interval=frame_interval,
+            seconds_interval=seconds_interval,
+            progress_callback=report_progress,
+            processor_options=processor_options,
+            adaptive_interval=adaptive_interval
+        )
+        
+        count = sum(results.values())
+        self.stdout.write(self.style.SUCCESS(f"Processed {count} total anomalous frames from {len(results)} videos"))
\ No newline at end of file
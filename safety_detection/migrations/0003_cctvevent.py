@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('safety_detection', '0002_processedvideo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CCTVEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('video_path', models.CharField(max_length=500)),
+                ('start_frame', models.IntegerField()),
+                ('end_frame', models.IntegerField()),
+                ('start_time', models.FloatField(blank=True, null=True)),
+                ('end_time', models.FloatField(blank=True, null=True)),
+                ('frame_count', models.IntegerField(default=0)),
+                ('peak_crowd_density', models.FloatField(default=0)),
+                ('mean_crowd_density', models.FloatField(default=0)),
+                ('max_threat_score', models.FloatField(default=0)),
+                ('threat_level', models.CharField(choices=[('low', 'Low'), ('medium', 'Medium'), ('high', 'High')], max_length=10)),
+                ('representative_frame', models.IntegerField()),
+                ('frame_image', models.ImageField(blank=True, upload_to='cctv_frames/')),
+                ('detected_objects', models.JSONField(default=dict)),
+                ('latitude', models.FloatField(blank=True, null=True)),
+                ('longitude', models.FloatField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='cctvanalysis',
+            name='event',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='frames', to='safety_detection.cctvevent'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('safety_detection', '0003_cctvevent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cctvanalysis',
+            name='camera_started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='cctvanalysis',
+            name='frame_number',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='cctvanalysis',
+            name='media_time',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('safety_detection', '0004_cctvanalysis_frame_position'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cctvevent',
+            name='ended_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='cctvevent',
+            name='started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
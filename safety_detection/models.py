@@ -32,10 +32,42 @@ class SocialMediaPost(models.Model):
     class Meta:
         ordering = ['-timestamp']
 
+class CCTVEvent(models.Model):
+    video_path = models.CharField(max_length=500)
+    start_frame = models.IntegerField()
+    end_frame = models.IntegerField()
+    # Seconds into the video; live streams have no media time
+    start_time = models.FloatField(null=True, blank=True)
+    end_time = models.FloatField(null=True, blank=True)
+    # Wall-clock times, for streams and for videos with a known camera start
+    started_at = models.DateTimeField(null=True, blank=True)
+    ended_at = models.DateTimeField(null=True, blank=True)
+    frame_count = models.IntegerField(default=0)
+    peak_crowd_density = models.FloatField(default=0)
+    mean_crowd_density = models.FloatField(default=0)
+    max_threat_score = models.FloatField(default=0)
+    threat_level = models.CharField(max_length=10, choices=ThreatLevel.choices)
+    representative_frame = models.IntegerField()
+    frame_image = models.ImageField(upload_to='cctv_frames/', blank=True)
+    detected_objects = models.JSONField(default=dict)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"CCTV Event - {self.threat_level} ({self.start_frame}-{self.end_frame})"
+
+    class Meta:
+        ordering = ['-created_at']
+
 class CCTVAnalysis(models.Model):
     video_path = models.CharField(max_length=500)
+    event = models.ForeignKey(CCTVEvent, null=True, blank=True, on_delete=models.SET_NULL, related_name='frames')
     frame_image = models.ImageField(upload_to='cctv_frames/')
     timestamp = models.DateTimeField()
+    frame_number = models.IntegerField(null=True, blank=True)
+    media_time = models.FloatField(null=True, blank=True)
+    camera_started_at = models.DateTimeField(null=True, blank=True)
     latitude = models.FloatField(null=True, blank=True)
     longitude = models.FloatField(null=True, blank=True)
     crowd_density = models.FloatField(null=True, blank=True)
@@ -48,6 +80,18 @@ class CCTVAnalysis(models.Model):
     def __str__(self):
         return f"CCTV Analysis - {self.threat_level}"
 
+class ProcessedVideo(models.Model):
+    path = models.CharField(max_length=500, unique=True)
+    size = models.BigIntegerField()
+    mtime = models.FloatField()
+    content_hash = models.CharField(max_length=64, blank=True)
+    last_frame = models.IntegerField(default=-1)
+    completed = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.path} - {'done' if self.completed else f'frame {self.last_frame}'}"
+
 class Alert(models.Model):
     title = models.CharField(max_length=255)
     description = models.TextField()
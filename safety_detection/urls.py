@@ -8,5 +8,7 @@ urlpatterns = [
     path('report/success/', views.ReportSuccessView.as_view(), name='report_success'),
     path('social-media/', views.SocialMediaAnalysisView.as_view(), name='social_media'),
     path('cctv/', views.CCTVAnalysisView.as_view(), name='cctv_analysis'),
+    path('cctv/<int:pk>/frame/', views.CCTVFrameView.as_view(), name='cctv_frame'),
+    path('cctv/events/<int:pk>/frame/', views.CCTVEventFrameView.as_view(), name='cctv_event_frame'),
     path('alerts/', views.AlertsListView.as_view(), name='alerts_list'),
 ]
\ No newline at end of file
@@ -0,0 +1,65 @@
+import cv2
+import os
+import threading
+from collections import OrderedDict
+from config.constants import CCTV_SETTINGS
+from .frame_preprocess import shrink_to_fit
+
+# Recently rendered frames, so paging back and forth does not decode them again
+CACHE_SIZE = 64
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+def extract_frame(video_path, frame_number=None, media_time=None):
+    """Decode a single frame of a video by frame number or by media time in seconds; None if unreadable
+    
+    Only local files can be seeked: an RTSP/HTTP stream ignores the position and
+    would return its current live frame, so such sources give None.
+    """
+    if not os.path.isfile(video_path):
+        print(f"Not a seekable video file: {video_path}")
+        return None
+    
+    cap = cv2.VideoCapture(video_path)
+    try:
+        if not cap.isOpened():
+            print(f"Could not open video: {video_path}")
+            return None
+        
+        if frame_number is not None:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
+        elif media_time is not None:
+            cap.set(cv2.CAP_PROP_POS_MSEC, media_time * 1000.0)
+        
+        ret, frame = cap.read()
+        return frame if ret else None
+    finally:
+        cap.release()
+
+
+def render_frame(video_path, frame_number=None, media_time=None, max_size=None, quality=None):
+    """Extract a frame and encode it as JPEG bytes, shrunk to fit max_size; None if unreadable"""
+    key = (video_path, frame_number, media_time, max_size, quality)
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+    
+    frame = extract_frame(video_path, frame_number, media_time)
+    if frame is None:
+        return None
+    
+    if max_size:
+        frame = shrink_to_fit(frame, max_size)
+    
+    quality = quality if quality is not None else CCTV_SETTINGS['IMAGE_QUALITY']
+    ok, encoded = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ok:
+        return None
+    
+    data = encoded.tobytes()
+    with _cache_lock:
+        _cache[key] = data
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return data
@@ -0,0 +1,59 @@
+import cv2
+import numpy as np
+from config.constants import CCTV_SETTINGS
+
+# Padding colour used by Ultralytics for its own letterboxing
+LETTERBOX_COLOR = (114, 114, 114)
+
+class FrameTransform:
+    """How a prepared frame maps back onto the original one: scale, then padding offset"""
+    
+    def __init__(self, scale, pad_x, pad_y, original_size):
+        self.scale = scale
+        self.pad_x = pad_x
+        self.pad_y = pad_y
+        self.original_size = original_size
+    
+    def to_original(self, boxes):
+        """Map an (N, 4) array of xyxy boxes from prepared to original pixel coordinates"""
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4).copy()
+        boxes[:, [0, 2]] = (boxes[:, [0, 2]] - self.pad_x) / self.scale
+        boxes[:, [1, 3]] = (boxes[:, [1, 3]] - self.pad_y) / self.scale
+        width, height = self.original_size
+        boxes[:, [0, 2]] = np.clip(boxes[:, [0, 2]], 0, width)
+        boxes[:, [1, 3]] = np.clip(boxes[:, [1, 3]], 0, height)
+        return boxes
+
+
+def shrink_to_fit(frame, max_size):
+    """Downscale a frame, keeping its aspect ratio, so it fits within max_size (width, height)"""
+    height, width = frame.shape[:2]
+    scale = min(max_size[0] / width, max_size[1] / height)
+    if scale >= 1:
+        return frame
+    return cv2.resize(frame, (max(1, int(width * scale)), max(1, int(height * scale))), interpolation=cv2.INTER_AREA)
+
+
+def prepare_frame(frame, max_size=None, letterbox=None):
+    """Downscale a decoded frame once for motion checks, inference and thumbnails
+    
+    The frame is shrunk to fit max_size (default MAX_FRAME_SIZE) and, with
+    letterbox, padded to exactly that size. Returns (image, FrameTransform);
+    the full-resolution frame is not needed afterwards.
+    """
+    max_size = max_size or CCTV_SETTINGS['MAX_FRAME_SIZE']
+    letterbox = CCTV_SETTINGS['LETTERBOX'] if letterbox is None else letterbox
+    height, width = frame.shape[:2]
+    
+    image = shrink_to_fit(frame, max_size)
+    scale = image.shape[1] / width
+    pad_x = pad_y = 0
+    
+    if letterbox:
+        pad_x = (max_size[0] - image.shape[1]) // 2
+        pad_y = (max_size[1] - image.shape[0]) // 2
+        image = cv2.copyMakeBorder(image, pad_y, max_size[1] - image.shape[0] - pad_y,
+                                   pad_x, max_size[0] - image.shape[1] - pad_x,
+                                   cv2.BORDER_CONSTANT, value=LETTERBOX_COLOR)
+    
+    return image, FrameTransform(scale, pad_x, pad_y, (width, height))
@@ -0,0 +1,141 @@
+import cv2
+from config.constants import CCTV_SETTINGS
+
+class FrameSampler:
+    """Iterate over sampled frames of a video, converting only the frames that are kept
+    
+    Skipped frames are advanced with cap.grab(). With the FFmpeg backend grab() still
+    decodes every frame, so for short intervals decode cost follows the video length;
+    what is saved is the BGR conversion and copy done by retrieve(). Seeking instead
+    would decode from the previous keyframe on every sample, which only pays off for
+    gaps longer than a typical GOP, so only gaps over SEEK_THRESHOLD frames on
+    seekable files are crossed with a seek.
+    """
+    
+    # Gaps of more than this many frames are crossed with a seek instead of grab() calls
+    SEEK_THRESHOLD = 120
+    
+    def __init__(self, video_path, frame_interval=30, seconds_interval=None, start_frame=0):
+        self.video_path = video_path
+        self.frame_interval = frame_interval
+        self.seconds_interval = seconds_interval
+        self.start_frame = start_frame
+        self.fps = 0
+        self.total_frames = 0
+        self.frames_retrieved = 0
+    
+    def frame_step(self):
+        """Number of source frames between two samples (may be fractional)"""
+        if self.seconds_interval and self.fps > 0:
+            return max(1.0, self.seconds_interval * self.fps)
+        return max(1, self.frame_interval or 1)
+    
+    def __iter__(self):
+        """Yield (frame_number, timestamp_seconds, frame) for every sampled frame
+        
+        Raises IOError if the video cannot be opened, so callers can tell an
+        unreadable file from one that has no frames left to sample.
+        """
+        cap = cv2.VideoCapture(self.video_path)
+        try:
+            if not cap.isOpened():
+                raise IOError(f"Could not open video: {self.video_path}")
+            
+            self.fps = cap.get(cv2.CAP_PROP_FPS) or 0
+            self.total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+            seekable = self.total_frames > 0
+            
+            frame_number = 0
+            next_position = float(self.start_frame)
+            
+            while True:
+                next_sample = int(round(next_position))
+                gap = next_sample - frame_number
+                
+                if gap > self.SEEK_THRESHOLD and seekable:
+                    if next_sample >= self.total_frames:
+                        break
+                    cap.set(cv2.CAP_PROP_POS_FRAMES, next_sample)
+                    frame_number = next_sample
+                else:
+                    grabbed = True
+                    while frame_number < next_sample:
+                        if not cap.grab():
+                            grabbed = False
+                            break
+                        frame_number += 1
+                    if not grabbed:
+                        break
+                
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                self.frames_retrieved += 1
+                
+                if self.fps > 0:
+                    timestamp = frame_number / self.fps
+                else:
+                    timestamp = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+                
+                yield frame_number, timestamp, frame
+                
+                frame_number += 1
+                next_position = max(next_position + self.frame_step(), frame_number)
+        finally:
+            cap.release()
+    
+    def observe(self, threat_score):
+        """Fixed-interval sampling ignores results; see AdaptiveFrameSampler"""
+        pass
+    
+    def needs_feedback(self):
+        """Whether the next sample depends on the result of the last one"""
+        return False
+
+
+class AdaptiveFrameSampler(FrameSampler):
+    """FrameSampler whose interval follows the threat score of the analyzed frames
+    
+    Call observe() with each result's threat_score. The interval falls straight
+    to the level the score calls for, from max_interval at a score of 0 down to
+    min_interval at ADAPTIVE_FULL_SCORE, and grows back by at most the backoff
+    factor per observed sample once the scene calms down. Above min_interval
+    needs_feedback() is true, so CCTVAnalyzer.iter_analyzed() analyzes each sample
+    before the next is taken and an incident densifies sampling right away.
+    
+    The price is batching: until the interval reaches min_interval, which on
+    normal footage is most of the time, each sample is a YOLO call of its own.
+    Adaptive sampling pays off when max_interval is large enough that the
+    samples saved outweigh the lost batching.
+    """
+    
+    def __init__(self, video_path, min_interval=None, max_interval=None, backoff=None, start_frame=0):
+        self.min_interval = max(1, min_interval or CCTV_SETTINGS['ADAPTIVE_MIN_INTERVAL'])
+        self.max_interval = max(self.min_interval, max_interval or CCTV_SETTINGS['ADAPTIVE_MAX_INTERVAL'])
+        self.backoff = backoff or CCTV_SETTINGS['ADAPTIVE_BACKOFF']
+        self.full_score = CCTV_SETTINGS['ADAPTIVE_FULL_SCORE']
+        super().__init__(video_path, self.max_interval, start_frame=start_frame)
+    
+    def observe(self, threat_score):
+        """Adjust the interval to the threat score of a recently sampled frame"""
+        target = self.target_interval(threat_score)
+        if target < self.frame_interval:
+            self.frame_interval = target
+        else:
+            self.frame_interval = min(target, self.frame_interval * self.backoff)
+    
+    def needs_feedback(self):
+        """True while a rising score could still shorten the interval"""
+        return self.frame_interval > self.min_interval
+    
+    def target_interval(self, threat_score):
+        """Interval for a score, interpolated geometrically between max_interval and min_interval"""
+        level = min(max(threat_score / self.full_score, 0.0), 1.0)
+        return self.max_interval * (self.min_interval / self.max_interval) ** level
+
+
+def create_sampler(video_path, frame_interval=30, seconds_interval=None, adaptive_interval=None, start_frame=0):
+    """FrameSampler for the given options; adaptive_interval=(min_interval, max_interval) overrides the others"""
+    if adaptive_interval:
+        return AdaptiveFrameSampler(video_path, *adaptive_interval, start_frame=start_frame)
+    return FrameSampler(video_path, frame_interval, seconds_interval, start_frame=start_frame)
@@ -0,0 +1,6 @@
+import hashlib
+import os
+
+def source_digest(video_path):
+    """Short hash that tells sources with the same file name (or frame numbers) apart"""
+    return hashlib.sha1(os.path.abspath(video_path).encode()).hexdigest()[:10]
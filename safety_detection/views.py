@@ -1,12 +1,14 @@
-from django.shortcuts import render, redirect
-from django.http import JsonResponse
+from django.shortcuts import render, redirect, get_object_or_404
+from django.http import JsonResponse, HttpResponse, Http404
 from django.views import View
 from django.utils import timezone
 from datetime import timedelta
 from django.db.models import Count, Avg
-from .models import SocialMediaPost, CCTVAnalysis, Alert, CitizenReport, ThreatLevel, IncidentType
+from .models import SocialMediaPost, CCTVAnalysis, CCTVEvent, Alert, CitizenReport, ThreatLevel, IncidentType
 from .forms import CitizenReportForm
-from .ai_analyzer import AlertSummarizer
+from .ai_analyzer import get_alert_summarizer
+from .utils.frame_extractor import render_frame
+from config.constants import CCTV_SETTINGS
 
 class DashboardView(View):
     def get(self, request):
@@ -93,7 +95,7 @@ class CitizenReportView(View):
             report = form.save()
             
             # Create alert from citizen report
-            summarizer = AlertSummarizer()
+            summarizer = get_alert_summarizer()
             summary = summarizer.generate_summary(
                 report.incident_type, 
                 {'threat_level': 'MEDIUM'}
@@ -148,6 +150,37 @@ class CCTVAnalysisView(View):
         }
         return render(request, 'safety_detection/cctv_analysis.html', context)
 
+class CCTVFrameView(View):
+    """Serve the image of an analyzed frame, decoding it from the source video when no JPEG was saved"""
+    
+    def get(self, request, pk):
+        analysis = get_object_or_404(CCTVAnalysis, pk=pk)
+        if analysis.frame_image and analysis.frame_image.storage.exists(analysis.frame_image.name):
+            return redirect(analysis.frame_image.url)
+        if analysis.frame_number is None and analysis.media_time is None:
+            raise Http404("Frame position was not recorded for this analysis")
+        return frame_response(request, analysis.video_path, analysis.frame_number, analysis.media_time)
+
+class CCTVEventFrameView(View):
+    """Serve the representative frame of a CCTV event"""
+    
+    def get(self, request, pk):
+        event = get_object_or_404(CCTVEvent, pk=pk)
+        if event.frame_image and event.frame_image.storage.exists(event.frame_image.name):
+            return redirect(event.frame_image.url)
+        return frame_response(request, event.video_path, event.representative_frame)
+
+def frame_response(request, video_path, frame_number=None, media_time=None):
+    """JPEG response for one frame of a video, shrunk to MAX_FRAME_SIZE unless ?full=1"""
+    max_size = None if request.GET.get('full') == '1' else CCTV_SETTINGS['MAX_FRAME_SIZE']
+    data = render_frame(video_path, frame_number, media_time if frame_number is None else None, max_size)
+    if data is None:
+        raise Http404("Frame could not be read from the source video")
+    
+    response = HttpResponse(data, content_type='image/jpeg')
+    response['Cache-Control'] = 'private, max-age=3600'
+    return response
+
 class AlertsListView(View):
     def get(self, request):
         alerts = Alert.objects.all().order_by('-created_at')
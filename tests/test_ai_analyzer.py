@@ -0,0 +1,365 @@
+import os
+import tempfile
+from unittest import mock
+import cv2
+import numpy as np
+from django.test import SimpleTestCase
+from config.model_configs import YOLO_CONFIG
+from safety_detection.ai_analyzer import CCTVAnalyzer, DuplicateFrameFilter, KeywordMatcher, MotionGate
+from safety_detection.ai_analyzer.social_media_analyzer import KEYWORD_ALIASES, SocialMediaAnalyzer
+from safety_detection.utils.frame_preprocess import FrameTransform, prepare_frame
+from safety_detection.utils.frame_sampler import AdaptiveFrameSampler, FrameSampler
+
+
+def write_test_video(path, frame_count=30, fps=10):
+    """Write an MJPG video whose frame n is a flat grey of brightness 8 * n"""
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), fps, (64, 48))
+    for n in range(frame_count):
+        writer.write(np.full((48, 64, 3), 8 * n, dtype=np.uint8))
+    writer.release()
+
+
+class KeywordMatcherTests(SimpleTestCase):
+    def setUp(self):
+        self.matcher = KeywordMatcher(['fire', 'crash', 'car crash', 'attack', 'protest', 'riot', 'gun', 'knife'],
+                                      KEYWORD_ALIASES)
+
+    def test_whole_words_only(self):
+        self.assertEqual(self.matcher.find('Fireworks over the bay tonight'), set())
+        self.assertEqual(self.matcher.find('FIRE in the building'), {'fire'})
+
+    def test_inflections(self):
+        self.assertEqual(self.matcher.find('Fires spread'), {'fire'})
+        self.assertEqual(self.matcher.find('They attacked the protesters'), {'attack', 'protest'})
+        self.assertEqual(self.matcher.find('rioting downtown, shots firing'), {'riot', 'fire'})
+        self.assertEqual(self.matcher.find('a man was gunned down'), {'gun'})
+
+    def test_aliases(self):
+        self.assertEqual(self.matcher.find('Gunfire and gunshots, a gunman with a shotgun'), {'gun'})
+        self.assertEqual(self.matcher.find('firearms and knives seized'), {'gun', 'knife'})
+
+    def test_phrase_reports_contained_keywords(self):
+        self.assertEqual(self.matcher.find('Big car crash on I-5'), {'car crash', 'crash'})
+        self.assertEqual(self.matcher.find('The truck crashed'), {'crash'})
+
+    def test_find_all_matches_find(self):
+        texts = ['Car crash and fire', None, 'nothing to see']
+        self.assertEqual(self.matcher.find_all(texts).tolist(), [self.matcher.find(text) for text in texts])
+
+
+class FrameSamplerTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.video_path = os.path.join(cls.directory.name, 'clip.avi')
+        write_test_video(cls.video_path)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+        super().tearDownClass()
+
+    def sample(self, sampler):
+        samples = list(sampler)
+        for frame_number, timestamp, frame in samples:
+            # The right frame was decoded, not just counted
+            self.assertAlmostEqual(float(frame.mean()), 8 * frame_number, delta=3)
+        return [(frame_number, round(timestamp, 3)) for frame_number, timestamp, frame in samples]
+
+    def test_frame_interval(self):
+        sampler = FrameSampler(self.video_path, frame_interval=10)
+        self.assertEqual(self.sample(sampler), [(0, 0.0), (10, 1.0), (20, 2.0)])
+        self.assertEqual(sampler.frames_retrieved, 3)
+
+    def test_seconds_interval(self):
+        sampler = FrameSampler(self.video_path, seconds_interval=0.7)
+        self.assertEqual([frame_number for frame_number, _ in self.sample(sampler)], [0, 7, 14, 21, 28])
+
+    def test_start_frame(self):
+        self.assertEqual(self.sample(FrameSampler(self.video_path, frame_interval=10, start_frame=15)),
+                         [(15, 1.5), (25, 2.5)])
+
+    def test_seeking_matches_grabbing(self):
+        with mock.patch.object(FrameSampler, 'SEEK_THRESHOLD', 3):
+            self.assertEqual(self.sample(FrameSampler(self.video_path, frame_interval=10)),
+                             [(0, 0.0), (10, 1.0), (20, 2.0)])
+
+    def test_unreadable_video(self):
+        with self.assertRaises(IOError):
+            list(FrameSampler(os.path.join(self.directory.name, 'missing.avi')))
+
+
+class AdaptiveFrameSamplerTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.video_path = os.path.join(cls.directory.name, 'clip.avi')
+        write_test_video(cls.video_path)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+        super().tearDownClass()
+
+    def sampler(self):
+        return AdaptiveFrameSampler(self.video_path, min_interval=2, max_interval=16, backoff=2)
+
+    def test_calm_scene_uses_max_interval(self):
+        sampler = self.sampler()
+        self.assertEqual([frame_number for frame_number, _, _ in sampler], [0, 16])
+        self.assertTrue(sampler.needs_feedback())
+
+    def test_incident_densifies_then_backs_off(self):
+        sampler = self.sampler()
+        scores = {0: 1.5, 2: 1.5}
+        sampled = []
+        for frame_number, _, _ in sampler:
+            sampled.append(frame_number)
+            sampler.observe(scores.get(frame_number, 0.0))
+        # Straight down to min_interval, then doubling back up: 2, 2, 4, 8, 16
+        self.assertEqual(sampled, [0, 2, 4, 8, 16])
+
+    def test_target_interval(self):
+        sampler = self.sampler()
+        self.assertEqual(sampler.target_interval(0.0), 16)
+        self.assertAlmostEqual(sampler.target_interval(0.75), 16 * (2 / 16) ** 0.5)
+        self.assertAlmostEqual(sampler.target_interval(9.0), 2)
+
+    def test_needs_feedback_only_above_min_interval(self):
+        sampler = self.sampler()
+        sampler.observe(1.5)
+        self.assertFalse(sampler.needs_feedback())
+        self.assertFalse(FrameSampler(self.video_path).needs_feedback())
+
+
+class MotionGateTests(SimpleTestCase):
+    def frame(self, brightness=0, box=False):
+        frame = np.full((120, 160, 3), brightness, dtype=np.uint8)
+        if box:
+            frame[20:80, 30:100] = 255
+        return frame
+
+    def test_static_frames_are_skipped(self):
+        gate = MotionGate(max_skipped=0)
+        self.assertEqual([gate.has_motion(self.frame()) for _ in range(3)], [True, False, False])
+        self.assertTrue(gate.has_motion(self.frame(box=True)))
+        self.assertEqual(gate.stats(), {'frames_checked': 4, 'frames_skipped': 2, 'skip_ratio': 0.5})
+
+    def test_refresh_after_max_skipped(self):
+        gate = MotionGate(max_skipped=2)
+        self.assertEqual([gate.has_motion(self.frame()) for _ in range(5)], [True, False, False, True, False])
+
+    def test_pixel_threshold_zero(self):
+        # A small brightness change is noise at the default threshold, but counts at 0
+        default_gate, strict_gate = MotionGate(max_skipped=0), MotionGate(pixel_threshold=0, max_skipped=0)
+        for gate in (default_gate, strict_gate):
+            gate.has_motion(self.frame(100))
+        self.assertFalse(default_gate.has_motion(self.frame(105)))
+        self.assertTrue(strict_gate.has_motion(self.frame(105)))
+
+    def test_reset_forgets_reference(self):
+        gate = MotionGate(max_skipped=0)
+        gate.has_motion(self.frame())
+        gate.reset()
+        self.assertTrue(gate.has_motion(self.frame()))
+
+
+class FakeTensor(np.ndarray):
+    """numpy array with the torch-style cpu()/numpy() calls the analyzer makes"""
+
+    def cpu(self):
+        return self
+
+    def numpy(self):
+        return np.asarray(self)
+
+
+class FakeBoxes:
+    def __init__(self, cls, conf, xyxy):
+        self.cls = np.asarray(cls, dtype=np.float32).view(FakeTensor)
+        self.conf = np.asarray(conf, dtype=np.float32).view(FakeTensor)
+        self.xyxy = np.asarray(xyxy, dtype=np.float32).reshape(-1, 4).view(FakeTensor)
+
+    def __iter__(self):
+        for index in range(len(self.cls)):
+            yield FakeBoxes(self.cls[index:index + 1], self.conf[index:index + 1], self.xyxy[index:index + 1])
+
+
+class FakeResult:
+    def __init__(self, names, class_names, confidences):
+        self.names = names
+        class_ids = [list(names.values()).index(name) if isinstance(names, dict) else names.index(name)
+                     for name in class_names]
+        boxes = [[n, n + 1, n + 10, n + 20] for n in range(len(class_ids))]
+        self.boxes = FakeBoxes(class_ids, confidences, boxes)
+
+
+def summarize_box_by_box(analyzer, result):
+    """The per-box loop _summarize_result used before it was vectorized"""
+    detections = {'people': 0, 'vehicles': 0, 'weapons': 0, 'fire': 0, 'objects': []}
+    threat_score = 0
+    for box in result.boxes:
+        class_name = result.names[int(box.cls[0])]
+        confidence = float(box.conf[0])
+        if class_name == 'person':
+            detections['people'] += 1
+            threat_score += analyzer.object_weights.get('person', 0.1) * confidence
+        elif class_name in ['car', 'truck', 'bus', 'motorcycle', 'bicycle']:
+            detections['vehicles'] += 1
+            threat_score += analyzer.object_weights.get(class_name, 0.05) * confidence
+        elif class_name in ['knife', 'gun']:
+            detections['weapons'] += 1
+            threat_score += analyzer.object_weights.get(class_name, 0.8) * confidence
+        elif class_name == 'fire':
+            detections['fire'] += 1
+            threat_score += analyzer.object_weights.get('fire', 0.9) * confidence
+        detections['objects'].append({'class': class_name, 'confidence': confidence, 'bbox': box.xyxy[0].tolist()})
+    if detections['people'] > 20:
+        threat_score += 0.3
+    if detections['people'] > 50:
+        threat_score += 0.5
+    threat_level = analyzer._calculate_threat_level(threat_score)
+    return {'detections': detections, 'threat_level': threat_level, 'threat_score': threat_score,
+            'crowd_density': detections['people'], 'anomaly_detected': threat_level != 'LOW'}
+
+
+class SummarizeResultTests(SimpleTestCase):
+    def setUp(self):
+        self.analyzer = CCTVAnalyzer()
+
+    def assertMatchesLoop(self, result):
+        summary, expected = self.analyzer._summarize_result(result), summarize_box_by_box(self.analyzer, result)
+        self.assertAlmostEqual(summary.pop('threat_score'), expected.pop('threat_score'), places=6)
+        self.assertEqual(summary, expected)
+        return summary
+
+    def test_coco_classes(self):
+        names = dict(enumerate(YOLO_CONFIG['CLASS_NAMES']))
+        summary = self.assertMatchesLoop(FakeResult(names, ['person', 'car', 'knife', 'dog', 'bus'],
+                                                    [0.9, 0.8, 0.7, 0.6, 0.5]))
+        self.assertEqual(summary['detections']['vehicles'], 2)
+        self.assertEqual(summary['detections']['objects'][3]['class'], 'dog')
+
+    def test_custom_model_classes(self):
+        summary = self.assertMatchesLoop(FakeResult({0: 'fire', 1: 'gun', 2: 'person'}, ['fire', 'gun', 'person'],
+                                                    [0.9, 0.9, 0.5]))
+        self.assertEqual(summary['threat_level'], 'HIGH')
+
+    def test_crowd(self):
+        summary = self.assertMatchesLoop(FakeResult(YOLO_CONFIG['CLASS_NAMES'], ['person'] * 30, [0.5] * 30))
+        self.assertEqual(summary['crowd_density'], 30)
+
+    def test_no_boxes(self):
+        summary = self.assertMatchesLoop(FakeResult(YOLO_CONFIG['CLASS_NAMES'], [], []))
+        self.assertFalse(summary['anomaly_detected'])
+
+
+class DuplicateFrameFilterTests(SimpleTestCase):
+    def frame(self, reverse=False, offset=0):
+        ramp = np.tile(np.linspace(0, 200, 160, dtype=np.uint8), (120, 1)) + offset
+        return np.dstack([ramp[:, ::-1] if reverse else ramp] * 3)
+
+    def test_near_identical_frame_is_suppressed(self):
+        frames = DuplicateFrameFilter(max_distance=4, window=4)
+        self.assertTrue(frames.is_new_scene('cam', self.frame(), 'HIGH'))
+        self.assertFalse(frames.is_new_scene('cam', self.frame(offset=3), 'HIGH'))
+        self.assertEqual(frames.stats(), {'frames_checked': 2, 'frames_suppressed': 1, 'suppress_ratio': 0.5})
+
+    def test_different_frame_or_threat_level_is_new(self):
+        frames = DuplicateFrameFilter(max_distance=4, window=4)
+        frames.is_new_scene('cam', self.frame(), 'HIGH')
+        self.assertTrue(frames.is_new_scene('cam', self.frame(reverse=True), 'HIGH'))
+        self.assertTrue(frames.is_new_scene('cam', self.frame(reverse=True), 'MEDIUM'))
+        # The window still remembers the first scene
+        self.assertFalse(frames.is_new_scene('cam', self.frame(), 'MEDIUM'))
+
+    def test_cameras_and_reset(self):
+        frames = DuplicateFrameFilter(max_distance=4, window=4)
+        frames.is_new_scene('a', self.frame(), 'HIGH')
+        self.assertTrue(frames.is_new_scene('b', self.frame(), 'HIGH'))
+        frames.reset('a')
+        self.assertTrue(frames.is_new_scene('a', self.frame(), 'HIGH'))
+        self.assertFalse(frames.is_new_scene('b', self.frame(), 'HIGH'))
+
+
+class FrameTransformTests(SimpleTestCase):
+    def test_to_original_undoes_scale_and_padding(self):
+        transform = FrameTransform(scale=0.5, pad_x=10, pad_y=20, original_size=(1280, 720))
+        boxes = transform.to_original([[10, 20, 110, 70]])
+        np.testing.assert_allclose(boxes, [[0, 0, 200, 100]])
+
+    def test_to_original_clips_to_frame(self):
+        transform = FrameTransform(scale=0.5, pad_x=0, pad_y=0, original_size=(100, 100))
+        boxes = transform.to_original([[-5, 10, 80, 60]])
+        np.testing.assert_allclose(boxes, [[0, 20, 100, 100]])
+
+    def test_prepare_frame_round_trip(self):
+        frame = np.zeros((720, 1280, 3), dtype=np.uint8)
+        image, transform = prepare_frame(frame, max_size=(640, 640), letterbox=True)
+        self.assertEqual(image.shape[:2], (640, 640))
+
+        # A box covering the whole prepared picture area maps to the whole original frame
+        height, width = 720 * transform.scale, 1280 * transform.scale
+        boxes = transform.to_original([[transform.pad_x, transform.pad_y,
+                                        transform.pad_x + width, transform.pad_y + height]])
+        np.testing.assert_allclose(boxes, [[0, 0, 1280, 720]])
+
+
+class FakePipeline:
+    """Stand-in transformers pipeline that can fail on whole batches or on chosen texts"""
+
+    def __init__(self, label, fail_batches=False, fail_on=()):
+        self.label = label
+        self.fail_batches = fail_batches
+        self.fail_on = fail_on
+        self.calls = 0
+
+    def __call__(self, texts, **kwargs):
+        self.calls += 1
+        if isinstance(texts, list) and self.fail_batches:
+            raise RuntimeError('out of memory')
+        for text in texts if isinstance(texts, list) else [texts]:
+            if any(word in text for word in self.fail_on):
+                raise RuntimeError('bad input')
+        return [[{'label': self.label, 'score': 0.9}] for _ in texts] if isinstance(texts, list) \
+            else [{'label': self.label, 'score': 0.9}]
+
+
+class AnalyzeBatchTests(SimpleTestCase):
+    texts = ['Riot downtown, shots fired', 'Lovely day at the beach', 'Car crash on the bridge, poison']
+
+    def analyze(self, sentiment, threat):
+        pipelines = {'sentiment-analysis': sentiment, 'text-classification': threat}
+        with mock.patch('safety_detection.ai_analyzer.social_media_analyzer.get_pipeline',
+                        side_effect=lambda task, model: pipelines[task]):
+            analyzer = SocialMediaAnalyzer()
+            batch = analyzer.analyze_batch(self.texts)
+            single = [{'sentiment': analyzer.analyze_sentiment(text)[0],
+                       'sentiment_score': analyzer.analyze_sentiment(text)[1],
+                       'threat_level': analyzer.detect_threat(text)[0],
+                       'confidence': analyzer.detect_threat(text)[1],
+                       'incident_type': analyzer.classify_incident_type(text)} for text in self.texts]
+        return batch, single
+
+    def test_batch_matches_single_text_methods(self):
+        batch, single = self.analyze(FakePipeline('POSITIVE'), FakePipeline('offensive'))
+        self.assertEqual(batch, single)
+        self.assertEqual(batch[0]['incident_type'], 'protest')
+
+    def test_failed_batch_falls_back_per_text(self):
+        sentiment = FakePipeline('NEGATIVE', fail_batches=True, fail_on=['poison'])
+        threat = FakePipeline('offensive', fail_batches=True)
+        batch, single = self.analyze(sentiment, threat)
+        self.assertEqual(batch, single)
+        # Only the text that fails on its own gets the neutral fallback
+        self.assertEqual([analysis['sentiment'] for analysis in batch], ['NEGATIVE', 'NEGATIVE', 'NEUTRAL'])
+        self.assertEqual(batch[2]['sentiment_score'], 0.5)
+        self.assertEqual(batch[2]['threat_level'], 'HIGH')
+
+    def test_empty_batch(self):
+        sentiment = FakePipeline('POSITIVE')
+        with mock.patch('safety_detection.ai_analyzer.social_media_analyzer.get_pipeline', return_value=sentiment):
+            self.assertEqual(SocialMediaAnalyzer().analyze_batch([]), [])
+        self.assertEqual(sentiment.calls, 0)
@@ -0,0 +1,354 @@
+import gzip
+import io
+import json
+import os
+import tempfile
+from datetime import datetime, timezone
+from unittest import mock
+import pandas as pd
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone as django_timezone
+from config.constants import DB_SETTINGS
+from safety_detection.models import SocialMediaPost
+from safety_detection.ai_analyzer import SocialMediaAnalyzer
+from safety_detection.data_ingestion import SocialMediaIngestor
+from safety_detection.data_ingestion import social_media_ingestor
+from safety_detection.data_ingestion.bulk_writer import BulkWriter
+from safety_detection.data_ingestion.camera_scheduler import CameraScheduler
+from safety_detection.data_ingestion.cctv_stream import DROP_NEWEST, DROP_OLDEST, FrameQueue
+from safety_detection.data_ingestion.detection_series import DetectionSeries, DetectionSeriesWriter
+from safety_detection.data_ingestion.event_aggregator import EventAggregator
+from safety_detection.data_ingestion.video_ledger import VideoLedger
+
+
+def fake_analysis(texts, batch_size=None):
+    return [{'sentiment': 'NEUTRAL', 'sentiment_score': 0.0, 'threat_level': 'LOW',
+             'confidence': 0.5, 'incident_type': 'other'} for _ in texts]
+
+
+@mock.patch.object(SocialMediaAnalyzer, 'analyze_batch', side_effect=fake_analysis)
+class CSVIngestionTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.ingestor = SocialMediaIngestor(chunk_size=2, progress_callback=lambda count: None)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_chunked_csv(self, analyze_batch):
+        path = os.path.join(self.directory.name, 'posts.csv')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('text,content,user,username,created_at,lat,latitude\n'
+                    'first post about the weather,,alice,,2024-01-01T10:00:00Z,1.5,\n'
+                    'short,,carol,,,,\n'
+                    ',second post stored under content,,bob,01/02/2024 11:00,,2.5\n'
+                    'third post without a user,,,,,north,\n'
+                    'fourth post about a crash,,dave,,not a date,,\n')
+
+        self.assertEqual(self.ingestor.ingest_csv(path), 4)
+        self.assertEqual([len(call.args[0]) for call in analyze_batch.call_args_list], [1, 2, 1])
+
+        posts = {post.author: post for post in SocialMediaPost.objects.all()}
+        self.assertEqual(sorted(posts), ['alice', 'bob', 'dave', 'unknown'])
+        self.assertEqual(posts['bob'].text, 'second post stored under content')
+        self.assertEqual((posts['alice'].latitude, posts['bob'].latitude, posts['unknown'].latitude), (1.5, 2.5, None))
+        self.assertEqual(posts['bob'].timestamp, datetime(2024, 1, 2, 11, 0, tzinfo=timezone.utc))
+        # Unparseable timestamps fall back to the ingestion time
+        self.assertGreater(posts['dave'].timestamp, datetime(2025, 1, 1, tzinfo=timezone.utc))
+
+    def test_progress_after_each_database_batch(self, analyze_batch):
+        path = os.path.join(self.directory.name, 'posts.csv')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('text\n' + ''.join(f'post number {n} of five\n' for n in range(5)))
+
+        totals = []
+        ingestor = SocialMediaIngestor(chunk_size=3, progress_callback=totals.append)
+        with mock.patch.dict(DB_SETTINGS, {'BATCH_SIZE': 2}):
+            self.assertEqual(ingestor.ingest_csv(path), 5)
+        self.assertEqual(totals, [2, 4, 5])
+
+    def test_missing_text_column(self, analyze_batch):
+        path = os.path.join(self.directory.name, 'posts.csv')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('user,created_at\nalice,2024-01-01\n')
+        self.assertEqual(self.ingestor.ingest_csv(path), 0)
+        analyze_batch.assert_not_called()
+
+    def test_first_valid_coalesces_columns(self, analyze_batch):
+        chunk = pd.DataFrame({'lat': ['1.5', None, 'north'], 'latitude': ['9', '2.5', '3.5']})
+        values = self.ingestor._first_valid(chunk, ['lat', 'latitude'], self.ingestor._parse_coordinates)
+        self.assertEqual(values.tolist(), [1.5, 2.5, 3.5])
+        self.assertTrue(self.ingestor._first_valid(chunk, []).isna().all())
+
+    def test_parse_timestamps_retries_other_formats(self, analyze_batch):
+        parsed = self.ingestor._parse_timestamps(pd.Series(['2024-01-01T10:00:00Z', '2024-01-02T11:00:00Z',
+                                                            '03/01/2024 12:00', 'garbage', None]))
+        self.assertEqual(parsed[:3].tolist(), [pd.Timestamp('2024-01-01 10:00', tz='UTC'),
+                                               pd.Timestamp('2024-01-02 11:00', tz='UTC'),
+                                               pd.Timestamp('2024-03-01 12:00', tz='UTC')])
+        self.assertTrue(parsed[3:].isna().all())
+
+
+@mock.patch.object(SocialMediaAnalyzer, 'analyze_batch', side_effect=fake_analysis)
+class JSONIngestionTests(TestCase):
+    records = [
+        {'text': 'first post about the weather', 'user': 'alice', 'created_at': '2024-01-01T10:00:00Z'},
+        {'text': 'second post with a nested user', 'user': {'id': 7, 'screen_name': 'bob'}, 'lat': '1.5'},
+        {'content': 'third post stored under content', 'tags': ['a', 'b']},
+    ]
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.ingestor = SocialMediaIngestor(chunk_size=2, progress_callback=lambda count: None)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, name, content, compress=False):
+        path = os.path.join(self.directory.name, name)
+        with (gzip.open(path, 'wt', encoding='utf-8') if compress else open(path, 'w', encoding='utf-8')) as f:
+            f.write(content)
+        return path
+
+    def test_json_array(self, analyze_batch):
+        path = self.write('posts.json', json.dumps(self.records, indent=2))
+        # A small read size makes elements span several reads
+        with mock.patch.object(social_media_ingestor, 'JSON_READ_SIZE', 16):
+            self.assertEqual(self.ingestor.ingest_json(path), 3)
+
+        self.assertEqual(sorted(SocialMediaPost.objects.values_list('author', flat=True)), ['alice', 'bob', 'unknown'])
+        self.assertEqual(SocialMediaPost.objects.get(author='bob').latitude, 1.5)
+
+    def test_json_lines_skips_malformed_lines(self, analyze_batch):
+        lines = [json.dumps(record) for record in self.records]
+        path = self.write('posts.jsonl', '\n'.join(lines[:1] + ['{not json', ''] + lines[1:]))
+        self.assertEqual(self.ingestor.ingest_json(path), 3)
+
+    def test_gzip_detected_by_content(self, analyze_batch):
+        path = self.write('posts.json.gz', json.dumps(self.records), compress=True)
+        self.assertEqual(self.ingestor.ingest_json(path), 3)
+
+    def test_malformed_array_element_keeps_earlier_records(self, analyze_batch):
+        content = '[' + json.dumps(self.records[0]) + ', {"text": "never closed ' + 'x' * 200 + ']'
+        with mock.patch.object(social_media_ingestor, 'JSON_READ_SIZE', 16), \
+                mock.patch.object(social_media_ingestor, 'JSON_MAX_ELEMENT_SIZE', 100):
+            records = list(self.ingestor._iter_json_records(io.StringIO(content)))
+        self.assertEqual(records, self.records[:1])
+
+
+class VideoLedgerTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.video_path = os.path.join(self.directory.name, 'clip.mp4')
+        with open(self.video_path, 'wb') as f:
+            f.write(b'video data')
+        self.ledger = VideoLedger()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_resume_and_skip(self):
+        self.assertEqual(self.ledger.start(self.video_path), 0)
+        self.ledger.checkpoint(self.video_path, 99)
+        self.assertEqual(self.ledger.start(self.video_path), 100)
+
+        self.ledger.complete(self.video_path)
+        self.assertIsNone(self.ledger.start(self.video_path))
+
+    def test_relative_and_absolute_paths_are_the_same_file(self):
+        self.ledger.start(self.video_path)
+        self.ledger.complete(self.video_path)
+        self.assertIsNone(self.ledger.start(os.path.relpath(self.video_path)))
+
+    def test_changed_file_starts_over(self):
+        self.ledger.start(self.video_path)
+        self.ledger.complete(self.video_path)
+        with open(self.video_path, 'ab') as f:
+            f.write(b' and more')
+        self.assertEqual(self.ledger.start(self.video_path), 0)
+
+    def test_touched_file_with_same_content_is_kept(self):
+        self.ledger.start(self.video_path)
+        self.ledger.complete(self.video_path)
+        stat = os.stat(self.video_path)
+        os.utime(self.video_path, (stat.st_atime, stat.st_mtime + 60))
+        self.assertIsNone(self.ledger.start(self.video_path))
+
+
+class EventAggregatorTests(SimpleTestCase):
+    def result(self, anomaly, threat_score=0.5):
+        return {'anomaly_detected': anomaly, 'crowd_density': 3, 'threat_score': threat_score,
+                'threat_level': 'HIGH' if anomaly else 'LOW', 'detections': {}}
+
+    def test_gap_within_max_gap_keeps_event_open(self):
+        events = EventAggregator(max_gap=1)
+        self.assertIsNone(events.update('v', 0, 0.0, self.result(True, 0.6)))
+        self.assertIsNone(events.update('v', 10, 1.0, self.result(False)))
+        self.assertIsNone(events.update('v', 20, 2.0, self.result(True, 0.9)))
+
+        event = events.open_event('v')
+        self.assertEqual((event['start_frame'], event['end_frame'], event['frame_count']), (0, 20, 2))
+        self.assertEqual(event['representative_frame'], 20)
+
+    def test_event_closes_after_max_gap(self):
+        events = EventAggregator(max_gap=1)
+        events.update('v', 0, 0.0, self.result(True))
+        self.assertIsNone(events.update('v', 10, 1.0, self.result(False)))
+        closed = events.update('v', 20, 2.0, self.result(False))
+
+        self.assertEqual((closed['start_frame'], closed['end_frame'], closed['frame_count']), (0, 0, 1))
+        self.assertIsNone(events.open_event('v'))
+
+    def test_stream_events_keep_wall_clock_times(self):
+        events = EventAggregator(max_gap=0)
+        first, last = datetime(2026, 1, 1, 12, 0, tzinfo=timezone.utc), datetime(2026, 1, 1, 12, 1, tzinfo=timezone.utc)
+        events.update('rtsp://cam', 0, None, self.result(True), recorded_at=first)
+        events.update('rtsp://cam', 1, None, self.result(True), recorded_at=last)
+
+        event = events.close('rtsp://cam')
+        self.assertEqual((event['start_time'], event['started_at'], event['ended_at']), (None, first, last))
+
+    def test_videos_are_tracked_separately(self):
+        events = EventAggregator(max_gap=0)
+        events.update('a', 0, 0.0, self.result(True))
+        self.assertIsNone(events.update('b', 0, 0.0, self.result(False)))
+        self.assertEqual([event['video_path'] for event in events.open_events()], ['a'])
+
+
+class DetectionSeriesTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'clip.mp4.series')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def record(self, frame_number, classes=('person',)):
+        objects = [{'class': name, 'confidence': 0.5, 'bbox': [1.0, 2.0, 3.5, 4.5]} for name in classes]
+        return {'frame_number': frame_number, 'timestamp': 1767268800.25 + frame_number,
+                'detections': {'people': classes.count('person'), 'objects': objects},
+                'threat_score': 0.75, 'anomaly_detected': True}
+
+    def write(self, frame_numbers, truncate_from=None):
+        writer = DetectionSeriesWriter(self.path, 'clip.mp4', truncate_from)
+        for frame_number in frame_numbers:
+            writer.write(self.record(frame_number, ('person', 'knife') if frame_number % 20 == 0 else ('car',)))
+        writer.close()
+        return DetectionSeries(self.path)
+
+    def test_round_trip(self):
+        series = self.write([0, 10])
+        self.assertEqual(series.class_names, ['person', 'knife', 'car'])
+        self.assertEqual(series.frames['frame_number'].tolist(), [0, 10])
+        # Epoch timestamps keep sub-second precision
+        self.assertEqual(series.frames['timestamp'].tolist(), [1767268800.25, 1767268810.25])
+        self.assertEqual(series.frames['people'].tolist(), [1, 0])
+        self.assertEqual(series.objects(1), [{'class': 'car', 'confidence': 0.5, 'bbox': [1.0, 2.0, 3.5, 4.5]}])
+        self.assertEqual(series.find_frame(10), 1)
+
+    def test_resume_drops_rows_past_checkpoint(self):
+        self.write([0, 10, 20])
+        series = self.write([10, 20], truncate_from=10)
+        self.assertEqual(series.frames['frame_number'].tolist(), [0, 10, 20])
+        self.assertEqual([len(series.frame_boxes(index)) for index in range(3)], [2, 1, 2])
+
+    def test_restart_from_frame_zero(self):
+        self.write([0, 20])
+        series = self.write([10], truncate_from=0)
+        self.assertEqual(series.frames['frame_number'].tolist(), [10])
+        self.assertEqual(series.class_names, ['car'])
+
+    def test_append(self):
+        self.write([0, 10])
+        series = self.write([0])
+        self.assertEqual(series.frames['frame_number'].tolist(), [0, 10, 0])
+        self.assertEqual(len(series.frame_boxes(2)), 2)
+
+
+class FrameQueueTests(SimpleTestCase):
+    def fill(self, queue, count):
+        return [queue.put(n) for n in range(count)]
+
+    def test_drop_oldest(self):
+        queue = FrameQueue(maxsize=2, drop_policy=DROP_OLDEST)
+        self.assertEqual(self.fill(queue, 3), [True, True, True])
+        self.assertEqual([queue.get_nowait(), queue.get_nowait(), queue.get_nowait()], [1, 2, None])
+        self.assertEqual(queue.dropped, 1)
+
+    def test_drop_newest(self):
+        queue = FrameQueue(maxsize=2, drop_policy=DROP_NEWEST)
+        self.assertEqual(self.fill(queue, 3), [True, True, False])
+        self.assertEqual([queue.get_nowait(), queue.get_nowait()], [0, 1])
+        self.assertEqual(queue.dropped, 1)
+
+    def test_unknown_policy(self):
+        with self.assertRaises(ValueError):
+            FrameQueue(drop_policy='random')
+
+
+class BulkWriterTests(TestCase):
+    def post(self, text, timestamp):
+        return SocialMediaPost(text=text, source='test', author='a', timestamp=timestamp,
+                               threat_level='LOW', incident_type='other')
+
+    def test_flushes_full_batches(self):
+        totals = []
+        writer = BulkWriter(SocialMediaPost, batch_size=2, progress_callback=totals.append)
+        for n in range(5):
+            writer.add(self.post(f'post {n}', django_timezone.now()))
+        self.assertEqual((len(writer), totals), (1, [2, 4]))
+        writer.flush()
+        self.assertEqual((SocialMediaPost.objects.count(), totals), (5, [2, 4, 5]))
+
+    def test_failed_batch_is_retried_row_by_row(self):
+        writer = BulkWriter(SocialMediaPost, batch_size=10)
+        now = django_timezone.now()
+        for post in [self.post('good one', now), self.post('bad one', None), self.post('good two', now)]:
+            writer.add(post)
+
+        self.assertEqual(writer.flush(), 2)
+        self.assertEqual((writer.written, writer.failed), (2, 1))
+        self.assertEqual(sorted(SocialMediaPost.objects.values_list('text', flat=True)), ['good one', 'good two'])
+
+
+class CameraSchedulerTests(SimpleTestCase):
+    def add(self, scheduler, camera, frames, **kwargs):
+        queue = FrameQueue(maxsize=frames)
+        for n in range(frames):
+            queue.put({'frame_number': n, 'analyze': True})
+        scheduler.add_camera(camera, queue, **kwargs)
+        return queue
+
+    def cameras(self, batch):
+        return [camera for camera, item in batch]
+
+    def test_equal_priorities_share_batches(self):
+        scheduler = CameraScheduler()
+        self.add(scheduler, 'a', 20)
+        self.add(scheduler, 'b', 20)
+        cameras = self.cameras(scheduler.next_batch(8))
+        self.assertEqual((cameras.count('a'), cameras.count('b')), (4, 4))
+
+    def test_priority_and_threat_boost(self):
+        scheduler = CameraScheduler(boosts={'LOW': 1.0, 'HIGH': 3.0})
+        self.add(scheduler, 'a', 40)
+        self.add(scheduler, 'b', 40)
+        scheduler.record_result('b', {'threat_level': 'HIGH'})
+        cameras = self.cameras(scheduler.next_batch(8))
+        self.assertEqual((cameras.count('a'), cameras.count('b')), (2, 6))
+
+    def test_budget_limits_camera(self):
+        scheduler = CameraScheduler(burst_seconds=1.0)
+        self.add(scheduler, 'a', 20, fps_budget=1.0)
+        self.add(scheduler, 'b', 20)
+        cameras = self.cameras(scheduler.next_batch(8))
+        self.assertEqual((cameras.count('a'), cameras.count('b')), (1, 7))
+
+    def test_skipped_frames_use_no_budget(self):
+        scheduler = CameraScheduler(burst_seconds=1.0)
+        queue = FrameQueue(maxsize=3)
+        for analyze in (False, False, True):
+            queue.put({'analyze': analyze})
+        scheduler.add_camera('a', queue, fps_budget=1.0)
+        batch = scheduler.next_batch(4)
+        self.assertEqual([item['analyze'] for _, item in batch], [False, False, True])